@@ -1,13 +1,62 @@
-# agent.py  (robust version using Gemini)
+# agent.py  (robust version using Gemini; other backends via backends.py)
 import os
 import json
+import math
+import time
+import random
+import itertools
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-from prompts import INTERVIEWER_SYSTEM_PROMPT, FEEDBACK_SYSTEM_PROMPT
+from backends import get_backend
+from compaction import HistoryCompactor
+from jsonstream import IncrementalObjectParser
+from llm_cache import ResponseCache
+from metrics import TOKENS_BUCKETS, CallTracker, prompt_bytes, registry
+from ratelimit import RateLimiter, current_session, is_speculative
+from resilience import ResilientCaller
+from router import ModelRouter
+from prompts import (
+    INTERVIEWER_SYSTEM_PROMPT,
+    INTERVIEWER_CHAT_ADDENDUM,
+    FEEDBACK_SYSTEM_PROMPT,
+    ANSWER_SCORING_PROMPT,
+    FEEDBACK_AGGREGATE_PROMPT,
+    OPENER_BANK_PROMPT,
+)
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+# ---- Model discovery settings ----
+# GEMINI_MODEL skips discovery entirely; otherwise the picked model is cached
+# on disk so cold starts of the app don't have to call list_models().
+MODEL_OVERRIDE_ENV = "GEMINI_MODEL"
+MODEL_CACHE_PATH = os.getenv(
+    "GEMINI_MODEL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "interview_partner", "model.json"),
+)
+MODEL_CACHE_TTL_SEC = float(os.getenv("GEMINI_MODEL_CACHE_TTL", 24 * 60 * 60))
+
+PREFERRED_MODELS = [
+    "models/gemini-1.5-flash",
+    "models/gemini-1.5-flash-latest",
+    "models/gemini-1.5-pro",
+    "models/gemini-1.5-pro-latest",
+    "models/gemini-1.0-pro",
+    "models/gemini-1.0-pro-001",
+]
+
+_model_name = None
+_available_models = None  # from the last discovery, if known
+
+
+def list_generate_models():
+    """Return the sorted names of all models that support generateContent."""
+    return sorted(get_backend().list_models())
+
 
 # ---- Auto-pick a valid model ----
 def pick_model():
@@ -17,19 +66,12 @@ def pick_model():
     - supports generateContent
     Preference order: 1.5-flash, 1.5-pro, 1.0-pro, etc.
     """
-    preferred = [
-        "models/gemini-1.5-flash",
-        "models/gemini-1.5-flash-latest",
-        "models/gemini-1.5-pro",
-        "models/gemini-1.5-pro-latest",
-        "models/gemini-1.0-pro",
-        "models/gemini-1.0-pro-001",
-    ]
+    global _available_models
 
-    models = list(genai.list_models())
-    available = {m.name for m in models if "generateContent" in m.supported_generation_methods}
+    available = set(list_generate_models())
+    _available_models = sorted(available)
 
-    for cand in preferred:
+    for cand in PREFERRED_MODELS:
         if cand in available:
             return cand
 
@@ -40,53 +82,892 @@ def pick_model():
     raise RuntimeError("No suitable Gemini model with generateContent found. Check your API key and access.")
 
 
-MODEL_NAME = pick_model()
-print(f"[agent.py] Using model: {MODEL_NAME}")
+def _read_model_cache():
+    global _available_models
+
+    try:
+        with open(MODEL_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
 
+    if time.time() - data.get("picked_at", 0) > MODEL_CACHE_TTL_SEC:
+        return None
+    _available_models = data.get("available")
+    return data.get("model")
 
-# ---- Core functions ----
 
-def get_next_question(role, interview_type, history, question_number, max_questions):
+def _write_model_cache(model_name):
+    try:
+        os.makedirs(os.path.dirname(MODEL_CACHE_PATH), exist_ok=True)
+        tmp_path = MODEL_CACHE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model_name, "available": _available_models, "picked_at": time.time()}, f)
+        os.replace(tmp_path, MODEL_CACHE_PATH)
+    except OSError:
+        # A read-only home dir just means we rediscover next start.
+        pass
+
+
+def get_model_name(refresh=False):
     """
-    history: list of {"question": str, "answer": str}
-    Returns: either next_question (str) or "INTERVIEW_COMPLETE"
+    Lazily resolve the model to use.
+    Order: backend's fixed model -> GEMINI_MODEL env var -> in-process value
+    -> disk cache -> pick_model().
+    Pass refresh=True to ignore the caches and run discovery again.
     """
+    global _model_name
+
+    fixed = get_backend().fixed_model_name
+    if fixed:
+        return fixed
+
+    override = os.getenv(MODEL_OVERRIDE_ENV)
+    if override:
+        return override
+
+    if _model_name and not refresh:
+        return _model_name
+
+    name = None if refresh else _read_model_cache()
+    if not name:
+        name = pick_model()
+        _write_model_cache(name)
+        print(f"[agent.py] Using model: {name}")
+
+    _model_name = name
+    return name
+
+
+# ---- Shared model objects ----
+# Model objects are cheap to reuse and thread-safe for generate_content,
+# so one is kept per (backend, model, system instruction).
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(system_instruction=None, model_name=None):
+    """Return the shared model object for the current backend, model name and system instruction."""
+    backend = get_backend()
+    key = (backend, model_name or get_model_name(), system_instruction)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = backend.create_model(key[1], system_instruction=system_instruction)
+            _models[key] = model
+        return model
+
+
+# ---- Resilient calls ----
+# Overall deadline per call site, covering retries and failover.
+CALL_DEADLINE_SEC = {
+    "opener": 20,
+    "question": 20,
+    "score": 30,
+    "aggregate": 60,
+    "feedback": 90,
+    "openers": 120,
+}
+DEFAULT_CALL_DEADLINE_SEC = float(os.getenv("LLM_DEADLINE_SEC", 60))
+
+# LLM_HEDGE=1 sends a duplicate request when a call is slower than that
+# site's recent p95. It trims tail latency at the cost of extra quota.
+resilient = ResilientCaller(
+    max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", 3)),
+    hedge=os.getenv("LLM_HEDGE", "0") == "1",
+)
+
+
+# ---- Model routing ----
+# With MODEL_ROUTER=1 (default) each call goes to the fastest healthy model
+# that meets its task's quality floor, instead of always the picked model.
+# Setting GEMINI_MODEL pins the model and turns routing off.
+MODEL_ROUTER_ENABLED = os.getenv("MODEL_ROUTER", "1") != "0"
+
+TASK_OF_SITE = {
+    "opener": "question",
+    "question": "question",
+    "score": "feedback",
+    "aggregate": "feedback",
+    "feedback": "feedback",
+    "openers": "feedback",
+}
+
+router = ModelRouter()
+
+
+def _failover_models(site):
+    """Models to try for this call, in order: routed choice first, then fallbacks."""
+    primary = get_model_name()
+    if get_backend().fixed_model_name:
+        return [primary]
+
+    candidates = [primary] + [m for m in PREFERRED_MODELS if m != primary]
+    if _available_models:
+        candidates = [m for m in candidates if m == primary or m in _available_models]
+
+    if not MODEL_ROUTER_ENABLED or os.getenv(MODEL_OVERRIDE_ENV):
+        return candidates
+    return router.route(TASK_OF_SITE.get(site, "question"), candidates)
+
+
+def _deadline(site, timeout):
+    return timeout or CALL_DEADLINE_SEC.get(site, DEFAULT_CALL_DEADLINE_SEC)
+
+
+# ---- Rate limiting ----
+# RATE_LIMIT_RPM / RATE_LIMIT_TPM cap requests and tokens per minute per model
+# across every session in this process (0 = no limit); RATE_LIMIT_DB=path
+# shares the same budget with other app processes on the host.
+RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", 0))
+RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", 0))
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB") or None
+
+# Output tokens reserved per call until usage_metadata reports the real count
+EXPECTED_OUTPUT_TOKENS = {
+    "opener": 100,
+    "question": 100,
+    "score": 300,
+    "aggregate": 800,
+    "feedback": 800,
+    "openers": 2000,
+}
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _rate_limiter(model_name):
+    if not (RATE_LIMIT_RPM or RATE_LIMIT_TPM):
+        return None
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model_name)
+        if limiter is None:
+            limiter = _rate_limiters[model_name] = RateLimiter(
+                model_name, RATE_LIMIT_RPM, RATE_LIMIT_TPM, RATE_LIMIT_DB
+            )
+        return limiter
+
+
+def rate_limit_snapshot():
+    """Per-model limiter state for the debug panel."""
+    with _rate_limiters_lock:
+        limiters = list(_rate_limiters.values())
+    return [limiter.snapshot() for limiter in limiters]
+
+
+def _reserve_tokens(site, contents, system_instruction):
+    return prompt_bytes(contents, system_instruction) // 4 + EXPECTED_OUTPUT_TOKENS.get(site, 500)
+
+
+def _limit_task(site):
+    """Rate-limit queue of a call; speculative (prefetch) calls wait behind the rest."""
+    return "prefetch" if is_speculative() else TASK_OF_SITE.get(site, "question")
+
+
+def _acquire(model_name, task, reserved, session, remaining):
+    """Wait for rate-limit capacity. Returns the time left for the request itself."""
+    limiter = _rate_limiter(model_name)
+    if limiter is None:
+        return remaining
+    return remaining - limiter.acquire(reserved, task, session, remaining)
+
+
+async def _acquire_async(model_name, task, reserved, session, remaining):
+    limiter = _rate_limiter(model_name)
+    if limiter is None:
+        return remaining
+    waited = await limiter.acquire_async(reserved, task, session, remaining)
+    return remaining - waited
+
+
+def _settle(model_name, reserved, usage, estimate=None):
+    """Correct the reservation with the reported usage, or with `estimate` tokens if there is none."""
+    limiter = _rate_limiter(model_name)
+    if limiter is None:
+        return
+    if usage is None:
+        used = estimate
+    else:
+        used = getattr(usage, "total_token_count", None) or (
+            (getattr(usage, "prompt_token_count", 0) or 0) + (getattr(usage, "candidates_token_count", 0) or 0)
+        )
+    limiter.settle(reserved, used)
+
+
+# ---- Response cache ----
+# Identical prompts (e.g. the opener for a given sidebar setup, or feedback
+# re-generated after a refresh) are served from cache. RESPONSE_CACHE=0 disables it.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH",
+    os.path.join(os.path.dirname(MODEL_CACHE_PATH), "responses.sqlite3"),
+)
+
+# Per call site: cache or not, how long, and how many variants to keep.
+# variants > 1 picks a random slot per call, so candidates with the same
+# setup still see some variety.
+CACHE_POLICY = {
+    "opener": {"enabled": True, "ttl_sec": 24 * 60 * 60, "variants": 5},
+    "question": {"enabled": True, "ttl_sec": 60 * 60, "variants": 1},
+    "feedback": {"enabled": True, "ttl_sec": 7 * 24 * 60 * 60, "variants": 1},
+    "score": {"enabled": True, "ttl_sec": 7 * 24 * 60 * 60, "variants": 1},
+    "aggregate": {"enabled": True, "ttl_sec": 7 * 24 * 60 * 60, "variants": 1},
+}
+
+response_cache = ResponseCache(path=RESPONSE_CACHE_PATH if RESPONSE_CACHE_ENABLED else None)
+
+
+def _cache_entry(site, contents, system_instruction, response_schema=None):
+    """Return (key, ttl) for this call, or (None, None) if it shouldn't be cached."""
+    policy = CACHE_POLICY.get(site)
+    if not RESPONSE_CACHE_ENABLED or not policy or not policy["enabled"]:
+        return None, None
+    variant = random.randrange(policy["variants"]) if policy["variants"] > 1 else 0
+    if response_schema is not None:
+        contents = [contents, response_schema]
+    key = ResponseCache.make_key(get_model_name(), contents, system_instruction, variant)
+    return key, policy["ttl_sec"]
+
+
+def _generation_config(response_schema):
+    """Ask for schema-constrained JSON output when a schema is given."""
+    if response_schema is None:
+        return None
+    return {"response_mime_type": "application/json", "response_schema": response_schema}
+
+
+def _generate(contents, site, system_instruction=None, timeout=None, response_schema=None):
+    """
+    Single blocking generate_content call behind the response cache and the
+    resilient call layer. timeout overrides the site's overall deadline;
+    response_schema requests JSON output matching that schema.
+    Returns stripped text.
+    """
+    with CallTracker(site, get_model_name(), contents, system_instruction) as call:
+        key, ttl = _cache_entry(site, contents, system_instruction, response_schema)
+        if key is not None:
+            call.cache = "miss"
+            cached = response_cache.get(key)
+            if cached is not None:
+                call.cache = "hit"
+                return cached
+
+        # Captured here: hedged attempts run on other threads
+        session, task = current_session(), _limit_task(site)
+        reserved = _reserve_tokens(site, contents, system_instruction)
+
+        def attempt(model_name, remaining):
+            remaining = _acquire(model_name, task, reserved, session, remaining)
+            model = get_model(system_instruction, model_name)
+            with router.observe(TASK_OF_SITE.get(site, "question"), model_name):
+                response = model.generate_content(
+                    contents,
+                    generation_config=_generation_config(response_schema),
+                    request_options={"timeout": remaining},
+                )
+                return response, response.text
+
+        (response, text), call.model = resilient.call(
+            site, _failover_models(site), attempt, _deadline(site, timeout)
+        )
+        call.usage = getattr(response, "usage_metadata", None)
+        _settle(call.model, reserved, call.usage)
+        text = text.strip()
+
+    if key is not None:
+        response_cache.set(key, text, ttl)
+    return text
+
+
+def _generate_stream(contents, site, system_instruction=None, response_schema=None):
+    """Streaming variant of _generate. Yields raw text chunks; a cache hit arrives as one chunk."""
+    with CallTracker(site, get_model_name(), contents, system_instruction) as call:
+        key, ttl = _cache_entry(site, contents, system_instruction, response_schema)
+        if key is not None:
+            call.cache = "miss"
+            cached = response_cache.get(key)
+            if cached is not None:
+                call.cache = "hit"
+                call.first_chunk()
+                yield cached
+                return
+
+        session, task = current_session(), _limit_task(site)
+        reserved = _reserve_tokens(site, contents, system_instruction)
+
+        def attempt(model_name, remaining):
+            # Only opening the stream is retried; once chunks reach the caller
+            # a failure can't be replayed transparently.
+            # The router sees time to first chunk for streamed calls.
+            remaining = _acquire(model_name, task, reserved, session, remaining)
+            model = get_model(system_instruction, model_name)
+            with router.observe(TASK_OF_SITE.get(site, "question"), model_name):
+                chunks = iter(model.generate_content(
+                    contents,
+                    stream=True,
+                    generation_config=_generation_config(response_schema),
+                    request_options={"timeout": remaining},
+                ))
+                first = next(chunks, None)
+            return itertools.chain([first] if first is not None else [], chunks)
+
+        response, call.model = resilient.call(
+            site, _failover_models(site), attempt, _deadline(site, None), hedge=False
+        )
+        parts = []
+        try:
+            for chunk in response:
+                call.first_chunk()
+                # usage_metadata on the last chunk covers the whole response
+                call.usage = getattr(chunk, "usage_metadata", None) or call.usage
+                parts.append(chunk.text)
+                yield chunk.text
+        finally:
+            # A stream closed early (e.g. at INTERVIEW_COMPLETE) never sees the
+            # usage on the last chunk; charge the prompt and what was streamed
+            streamed = prompt_bytes(contents, system_instruction) + len("".join(parts).encode("utf-8"))
+            _settle(call.model, reserved, call.usage, estimate=streamed // 4)
+
+    # Only complete responses are cached
+    if key is not None:
+        response_cache.set(key, "".join(parts).strip(), ttl)
+
+
+def _question_site(history):
+    return "question" if history else "opener"
+
+
+# ---- History compaction ----
+# Token budgets for the history part of each prompt; 0 disables compaction.
+QUESTION_HISTORY_BUDGET = int(os.getenv("QUESTION_HISTORY_BUDGET", 1500))
+FEEDBACK_HISTORY_BUDGET = int(os.getenv("FEEDBACK_HISTORY_BUDGET", 6000))
+
+history_compactor = HistoryCompactor(budget_tokens=QUESTION_HISTORY_BUDGET)
+
+
+def _compact(history, budget, prompt):
+    """Compact history for one prompt ("question", "chat" or "feedback") and report what it saved."""
+    summary, recent, stats = history_compactor.compact(history, budget_tokens=budget)
+    labels = {"prompt": prompt}
+    if summary is not None:
+        registry.inc("interview_history_compactions_total", labels,
+                     help_text="Prompts whose history was folded into a summary.")
+    registry.inc("interview_history_bytes_saved_total", labels, stats["bytes_saved"],
+                 "History bytes left out of prompts by compaction.")
+    registry.inc("interview_history_tokens_saved_total", labels, stats["tokens_saved"],
+                 "Estimated history tokens left out of prompts by compaction.")
+    for stage in ("before", "after"):
+        registry.observe("interview_history_tokens", {"prompt": prompt, "stage": stage}, stats[f"tokens_{stage}"],
+                         TOKENS_BUCKETS, "Estimated history tokens per prompt, before and after compaction.")
+    return summary, recent
+
+
+# ---- Answer signals ----
+# Pace, fillers, variety, repetition and keyword coverage from analytics.py,
+# computed locally and sent with question and feedback prompts. They stand in
+# for the per-answer word counts and timings, so history items carry only the
+# question and answer text.
+ANSWER_SIGNALS = os.getenv("ANSWER_SIGNALS", "1") != "0"
+
+
+def _signals(history, role, per_answer=False):
+    if not ANSWER_SIGNALS or not history:
+        return None
+    # Imported here so numpy stays out of agent's import time
+    from analytics import answer_signals
+
+    return answer_signals(history, role, per_answer=per_answer)
+
+
+def _transcript(items):
+    if not ANSWER_SIGNALS:
+        return items
+    return [{"question": item["question"], "answer": item["answer"]} for item in items]
+
+
+# ---- Core functions ----
+
+INTERVIEW_COMPLETE = "INTERVIEW_COMPLETE"
+
+
+def _build_question_prompt(role, interview_type, history, question_number, max_questions, history_budget):
     system_prompt = INTERVIEWER_SYSTEM_PROMPT.format(
         role=role,
         interview_type=interview_type
     )
 
+    summary, recent = _compact(history, history_budget, "question")
     user_content = {
-        "history": history,
+        "history": _transcript(recent),
         "question_number": question_number,
         "max_questions": max_questions,
     }
+    if summary is not None:
+        user_content["history_summary"] = summary
+    signals = _signals(history, role)
+    if signals is not None:
+        user_content["answer_signals"] = signals
+
+    return system_prompt + "\n\nUser Data:\n" + json.dumps(user_content)
+
+
+def _held_back_len(text):
+    """Length of the longest suffix of text that could still grow into the sentinel."""
+    for n in range(min(len(text), len(INTERVIEW_COMPLETE) - 1), 0, -1):
+        if INTERVIEW_COMPLETE.startswith(text[-n:]):
+            return n
+    return 0
+
+
+def filter_question_stream(chunks):
+    """
+    Pass text chunks through, stripping leading whitespace and watching for
+    INTERVIEW_COMPLETE even when it is split across chunks.
+    If the sentinel shows up, it is yielded on its own as the last chunk.
+    """
+    pending = ""
+    started = False
+
+    for chunk in chunks:
+        pending += chunk
+        if not started:
+            pending = pending.lstrip()
+            if not pending:
+                continue
+
+        if INTERVIEW_COMPLETE in pending:
+            before = pending[:pending.index(INTERVIEW_COMPLETE)].rstrip()
+            if before:
+                yield before
+            yield INTERVIEW_COMPLETE
+            return
 
-    full_prompt = system_prompt + "\n\nUser Data:\n" + json.dumps(user_content)
+        keep = _held_back_len(pending)
+        out = pending[:len(pending) - keep]
+        if out:
+            started = True
+            yield out
+        pending = pending[len(pending) - keep:]
 
-    model = genai.GenerativeModel(MODEL_NAME)
-    response = model.generate_content(full_prompt)
-    return response.text.strip()
+    if pending.rstrip():
+        yield pending.rstrip()
 
 
-def generate_feedback(role, interview_type, history):
+def get_next_question(role, interview_type, history, question_number, max_questions, history_budget=None):
     """
     history: list of {"question": str, "answer": str}
-    Returns: dict feedback
+    history_budget: token budget for history (default QUESTION_HISTORY_BUDGET)
+    Returns: either next_question (str) or "INTERVIEW_COMPLETE"
+    """
+    full_prompt = _build_question_prompt(
+        role, interview_type, history, question_number, max_questions, history_budget
+    )
+    return _generate(full_prompt, _question_site(history))
+
+
+def stream_next_question(role, interview_type, history, question_number, max_questions, history_budget=None):
+    """
+    Streaming variant of get_next_question.
+    Yields text chunks as they arrive; see filter_question_stream for how
+    INTERVIEW_COMPLETE is reported.
+    """
+    full_prompt = _build_question_prompt(
+        role, interview_type, history, question_number, max_questions, history_budget
+    )
+    yield from filter_question_stream(_generate_stream(full_prompt, _question_site(history)))
+
+
+# ---- Chat session mode ----
+
+class InterviewChat:
+    """
+    Alternative prompt format for get_next_question / stream_next_question:
+    the interviewer prompt goes out as the model's system_instruction and the
+    history as chat turns instead of one JSON prompt.
+
+    It does not make requests smaller. The API is stateless, so every call
+    resends the system instruction and every (compacted) turn, and the turn
+    framing costs slightly more than the single prompt. Off by default.
+
+    Turns are rebuilt from `history` on each call, so the result depends only
+    on the arguments and speculative (prefetched) calls are safe.
     """
+
+    @staticmethod
+    def _system_instruction(role, interview_type):
+        return INTERVIEWER_SYSTEM_PROMPT.format(
+            role=role,
+            interview_type=interview_type
+        ) + INTERVIEWER_CHAT_ADDENDUM
+
+    @staticmethod
+    def build_turns(history, question_number, max_questions, history_budget=None, role=None):
+        """
+        Chat contents for the call: opening message, then (question, answer) turn pairs.
+        Older pairs beyond the budget are folded into a summary in the opening message.
+        role: for keyword coverage in the answer signals on the latest turn
+        """
+        summary, recent = _compact(history, history_budget, "chat")
+        opening = "Start the interview."
+        if summary is not None:
+            opening += "\n\nSummary of the earlier part of the interview:\n" + summary
+
+        turns = [{"role": "user", "parts": [opening]}]
+        for item in recent:
+            answer = {"answer": item["answer"]}
+            if not ANSWER_SIGNALS:
+                answer["answer_word_count"] = item.get("answer_word_count")
+                answer["response_time_sec"] = item.get("response_time_sec")
+            turns.append({"role": "model", "parts": [item["question"]]})
+            turns.append({"role": "user", "parts": [json.dumps(answer)]})
+
+        # Only the latest turn needs to know where we are in the interview
+        progress = {"question_number": question_number, "max_questions": max_questions}
+        signals = _signals(history, role)
+        if signals is not None:
+            progress["answer_signals"] = signals
+        turns[-1]["parts"].append(json.dumps(progress))
+        return turns
+
+    def get_next_question(self, role, interview_type, history, question_number, max_questions, history_budget=None):
+        return _generate(
+            self.build_turns(history, question_number, max_questions, history_budget, role),
+            _question_site(history),
+            system_instruction=self._system_instruction(role, interview_type),
+        )
+
+    def stream_next_question(self, role, interview_type, history, question_number, max_questions, history_budget=None):
+        chunks = _generate_stream(
+            self.build_turns(history, question_number, max_questions, history_budget, role),
+            _question_site(history),
+            system_instruction=self._system_instruction(role, interview_type),
+        )
+        yield from filter_question_stream(chunks)
+
+
+def _build_feedback_prompt(role, interview_type, history, history_budget):
+    if history_budget is None:
+        history_budget = FEEDBACK_HISTORY_BUDGET
+    summary, recent = _compact(history, history_budget, "feedback")
+
     user_content = {
         "role": role,
         "interview_type": interview_type,
-        "history": history
+        "history": _transcript(recent)
     }
+    if summary is not None:
+        user_content["history_summary"] = summary
+    signals = _signals(history, role, per_answer=True)
+    if signals is not None:
+        user_content["answer_signals"] = signals
+
+    return FEEDBACK_SYSTEM_PROMPT + "\n\nUser Data:\n" + json.dumps(user_content)
+
+
+# ---- Structured feedback ----
 
-    full_prompt = FEEDBACK_SYSTEM_PROMPT + "\n\nUser Data:\n" + json.dumps(user_content)
+SCORE_KEYS = ["communication", "technical_depth", "structure", "confidence"]
 
-    model = genai.GenerativeModel(MODEL_NAME)
-    response = model.generate_content(full_prompt)
-    raw = response.text.strip()
+_SCORES_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {key: {"type": "NUMBER"} for key in SCORE_KEYS},
+    "required": SCORE_KEYS,
+}
+_STRING_LIST_SCHEMA = {"type": "ARRAY", "items": {"type": "STRING"}}
 
+# Property order matches the order the UI renders partial results in
+FEEDBACK_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "overall_summary": {"type": "STRING"},
+        "scores": _SCORES_SCHEMA,
+        "strengths": _STRING_LIST_SCHEMA,
+        "areas_to_improve": _STRING_LIST_SCHEMA,
+        "next_practice_tasks": _STRING_LIST_SCHEMA,
+    },
+    "required": ["overall_summary", "scores", "strengths", "areas_to_improve", "next_practice_tasks"],
+}
+
+ANSWER_SCORE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "scores": _SCORES_SCHEMA,
+        "summary": {"type": "STRING"},
+        "strengths": _STRING_LIST_SCHEMA,
+        "areas_to_improve": _STRING_LIST_SCHEMA,
+    },
+    "required": ["scores", "summary", "strengths", "areas_to_improve"],
+}
+
+
+def _string_list(value):
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _score_dict(value):
+    """Known score keys with numeric values, clamped to 0–10; anything else is dropped."""
+    if not isinstance(value, dict):
+        return {}
+    scores = {}
+    for key in SCORE_KEYS:
+        try:
+            score = float(value[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if math.isfinite(score):
+            scores[key] = min(max(score, 0.0), 10.0)
+    return scores
+
+
+@dataclass
+class FeedbackResult:
+    """
+    Validated interview feedback. Scores are floats clamped to 0–10.
+    raw_text is set (and everything else empty) only when the model output
+    couldn't be parsed at all. complete is False for partial streamed results.
+    """
+
+    overall_summary: str = ""
+    scores: dict = field(default_factory=dict)
+    strengths: list = field(default_factory=list)
+    areas_to_improve: list = field(default_factory=list)
+    next_practice_tasks: list = field(default_factory=list)
+    raw_text: str = None
+    complete: bool = True
+
+    @classmethod
+    def from_dict(cls, data, complete=True):
+        return cls(
+            overall_summary=str(data.get("overall_summary") or "").strip(),
+            scores=_score_dict(data.get("scores")),
+            strengths=_string_list(data.get("strengths")),
+            areas_to_improve=_string_list(data.get("areas_to_improve")),
+            next_practice_tasks=_string_list(data.get("next_practice_tasks")),
+            complete=complete,
+        )
+
+    @classmethod
+    def from_text(cls, raw):
+        parsed = parse_json_text(raw)
+        if isinstance(parsed, dict):
+            return cls.from_dict(parsed)
+        return cls(raw_text=raw)
+
+
+def _stream_feedback_result(contents, site):
+    """Yield partial FeedbackResults as the JSON streams in, then the final validated one."""
+    parser = IncrementalObjectParser()
+    parts = []
+    for chunk in _generate_stream(contents, site, response_schema=FEEDBACK_SCHEMA):
+        parts.append(chunk)
+        parser.feed(chunk)
+        fields = dict(parser.fields)
+        if parser.partial:
+            fields[parser.partial[0]] = parser.partial[1]
+        if fields and not parser.done:
+            yield FeedbackResult.from_dict(fields, complete=False)
+
+    yield FeedbackResult.from_text("".join(parts).strip())
+
+
+def generate_feedback(role, interview_type, history, history_budget=None):
+    """
+    history: list of {"question": str, "answer": str}
+    history_budget: token budget for history (default FEEDBACK_HISTORY_BUDGET)
+    Returns: FeedbackResult
+    """
+    full_prompt = _build_feedback_prompt(role, interview_type, history, history_budget)
+    return FeedbackResult.from_text(_generate(full_prompt, "feedback", response_schema=FEEDBACK_SCHEMA))
+
+
+def stream_feedback(role, interview_type, history, history_budget=None):
+    """Streaming variant of generate_feedback; the last FeedbackResult yielded is complete."""
+    full_prompt = _build_feedback_prompt(role, interview_type, history, history_budget)
+    yield from _stream_feedback_result(full_prompt, "feedback")
+
+
+def parse_json_text(raw):
+    """
+    Parse a JSON object from model output, tolerating surrounding prose or
+    code fences. Returns None if no object can be recovered.
+    """
     try:
         return json.loads(raw)
     except json.JSONDecodeError:
-        return {"raw_text": raw}
+        pass
+
+    start = raw.find("{")
+    end = raw.rfind("}")
+    if start != -1 and end != -1:
+        try:
+            return json.loads(raw[start : end + 1])
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+# ---- Incremental feedback ----
+
+def score_answer(role, interview_type, item, timeout=None):
+    """
+    Score a single history item against the feedback rubric.
+    timeout: optional per-request deadline in seconds
+    Returns: dict with scores, summary, strengths, areas_to_improve
+    Raises ValueError if the model output isn't valid JSON.
+    """
+    user_content = {
+        "role": role,
+        "interview_type": interview_type,
+        "question": item["question"],
+        "answer": item["answer"],
+        "answer_word_count": item.get("answer_word_count"),
+        "response_time_sec": item.get("response_time_sec"),
+    }
+
+    full_prompt = ANSWER_SCORING_PROMPT + "\n\nUser Data:\n" + json.dumps(user_content)
+
+    raw = _generate(full_prompt, "score", timeout=timeout, response_schema=ANSWER_SCORE_SCHEMA)
+    result = parse_json_text(raw)
+    if not isinstance(result, dict):
+        raise ValueError("Answer score was not a JSON object")
+    return result
+
+
+def _build_aggregate_prompt(role, interview_type, history, answer_scores):
+    evaluations = []
+    for item, evaluation in zip(history, answer_scores):
+        entry = {"question": item["question"], "evaluation": evaluation}
+        if evaluation is None:
+            entry["answer"] = item["answer"]
+        evaluations.append(entry)
+
+    user_content = {
+        "role": role,
+        "interview_type": interview_type,
+        "answer_evaluations": evaluations,
+    }
+    signals = _signals(history, role)
+    if signals is not None:
+        user_content["answer_signals"] = signals["overall"]
+
+    return FEEDBACK_AGGREGATE_PROMPT + "\n\nUser Data:\n" + json.dumps(user_content)
+
+
+def aggregate_feedback(role, interview_type, history, answer_scores):
+    """
+    Build the final feedback from per-answer results of score_answer.
+    answer_scores: list aligned with history; None where an answer couldn't
+    be scored, in which case the raw answer is sent instead
+    Returns: FeedbackResult
+    """
+    full_prompt = _build_aggregate_prompt(role, interview_type, history, answer_scores)
+    return FeedbackResult.from_text(_generate(full_prompt, "aggregate", response_schema=FEEDBACK_SCHEMA))
+
+
+def stream_aggregate_feedback(role, interview_type, history, answer_scores):
+    """Streaming variant of aggregate_feedback; the last FeedbackResult yielded is complete."""
+    full_prompt = _build_aggregate_prompt(role, interview_type, history, answer_scores)
+    yield from _stream_feedback_result(full_prompt, "aggregate")
+
+
+def generate_openers(role, interview_type, count):
+    """
+    Generate `count` distinct opening questions for the offline opener pack.
+    Returns: list of str (possibly fewer than count after de-duplication)
+    """
+    full_prompt = OPENER_BANK_PROMPT.format(role=role, interview_type=interview_type, count=count)
+
+    # Not cached: rebuilding the pack should produce fresh questions
+    raw = _generate(full_prompt, "openers")
+    start = raw.find("[")
+    end = raw.rfind("]")
+    try:
+        questions = json.loads(raw[start : end + 1]) if start != -1 else []
+    except json.JSONDecodeError:
+        questions = []
+
+    seen = set()
+    unique = []
+    for q in questions:
+        if isinstance(q, str) and q.strip() and q.strip().lower() not in seen:
+            seen.add(q.strip().lower())
+            unique.append(q.strip())
+    return unique
+
+
+# ---- Async API ----
+# For embedding the agent in an async server: calls share the model objects
+# above and are limited per event loop by a semaphore. Cancelling the calling
+# task cancels the in-flight request.
+
+ASYNC_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", 16))
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _generate_async(contents, site, system_instruction=None, timeout=None, response_schema=None):
+    if _model_name is None and not os.getenv(MODEL_OVERRIDE_ENV) and not get_backend().fixed_model_name:
+        # First call may run model discovery, which is blocking network I/O
+        await asyncio.to_thread(get_model_name)
+
+    with CallTracker(site, get_model_name(), contents, system_instruction) as call:
+        key, ttl = _cache_entry(site, contents, system_instruction, response_schema)
+        if key is not None:
+            call.cache = "miss"
+            cached = response_cache.get(key)
+            if cached is not None:
+                call.cache = "hit"
+                return cached
+
+        session, task = current_session(), _limit_task(site)
+        reserved = _reserve_tokens(site, contents, system_instruction)
+
+        async def attempt(model_name, remaining):
+            remaining = await _acquire_async(model_name, task, reserved, session, remaining)
+            model = get_model(system_instruction, model_name)
+            async with _get_semaphore():
+                with router.observe(TASK_OF_SITE.get(site, "question"), model_name):
+                    return await model.generate_content_async(
+                        contents,
+                        generation_config=_generation_config(response_schema),
+                        request_options={"timeout": remaining},
+                    )
+
+        response, call.model = await resilient.call_async(
+            site, _failover_models(site), attempt, _deadline(site, timeout)
+        )
+        call.usage = getattr(response, "usage_metadata", None)
+        _settle(call.model, reserved, call.usage)
+        text = response.text.strip()
+
+    if key is not None:
+        response_cache.set(key, text, ttl)
+    return text
+
+
+async def get_next_question_async(role, interview_type, history, question_number, max_questions,
+                                  history_budget=None, timeout=None):
+    """Async version of get_next_question."""
+    full_prompt = _build_question_prompt(
+        role, interview_type, history, question_number, max_questions, history_budget
+    )
+    return await _generate_async(full_prompt, _question_site(history), timeout=timeout)
+
+
+async def generate_feedback_async(role, interview_type, history, history_budget=None, timeout=None):
+    """Async version of generate_feedback."""
+    full_prompt = _build_feedback_prompt(role, interview_type, history, history_budget)
+    raw = await _generate_async(full_prompt, "feedback", timeout=timeout, response_schema=FEEDBACK_SCHEMA)
+    return FeedbackResult.from_text(raw)
@@ -0,0 +1,218 @@
+# analytics.py
+# Local answer analytics: speaking pace, filler words, lexical diversity,
+# repetition and role keyword coverage, computed in one batched NumPy pass
+# over the interview history. The compact result goes into the question and
+# feedback prompts as answer_signals, so the model gets these judgements
+# without an extra call and without needing every raw detail of the transcript.
+import re
+
+import numpy as np
+
+# Single-word and two-word fillers. "like" and "so" are left out: they are
+# ordinary words far more often than fillers.
+FILLER_WORDS = ("um", "uh", "umm", "uhm", "erm", "er", "hmm", "ah", "basically", "literally", "honestly", "actually")
+FILLER_PHRASES = (("you", "know"), ("i", "mean"), ("kind", "of"), ("sort", "of"))
+
+# Stems matched against the start of each word ("scal" covers scale, scaling, scalability).
+# Keys follow openers.ROLES.
+ROLE_KEYWORDS = {
+    "Software Engineer": (
+        "algorithm", "api", "architect", "cach", "complexit", "concurren", "data structure", "databas",
+        "debug", "deploy", "design", "latenc", "monitor", "perform", "refactor", "review", "scal", "test",
+        "trade",
+    ),
+    "Data Analyst": (
+        "a/b", "aggregat", "clean", "correlat", "dashboard", "distribut", "excel", "experiment",
+        "hypothes", "insight", "kpi", "metric", "outlier", "python", "regress", "sample", "signific",
+        "sql", "stakeholder", "trend", "visuali",
+    ),
+    "Sales Associate": (
+        "clos", "commission", "customer", "crm", "deal", "follow", "listen", "lead", "need",
+        "negotiat", "objection", "pipeline", "prospect", "quota", "rapport", "referr", "relationship",
+        "target", "trust", "upsell",
+    ),
+    "Product Manager": (
+        "backlog", "customer", "data", "deadline", "discover", "experiment", "feature", "feedback", "goal",
+        "launch", "metric", "mvp", "priorit", "research", "roadmap", "scope", "stakeholder", "strateg",
+        "trade", "user", "vision",
+    ),
+}
+
+# Where an answer stops being unremarkable
+SHORT_ANSWER_WORDS = 25
+LONG_ANSWER_WORDS = 300
+SLOW_WPM = 15  # typed answers with thinking time often sit around 20-40
+FAST_WPM = 200
+FILLER_RATE_HIGH = 0.05
+REPETITION_HIGH = 0.15
+DIVERSITY_LOW = 0.4
+
+# Uncovered keyword stems listed in the signals, for the interviewer to probe
+MAX_UNCOVERED_LISTED = 6
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'/+#-]*")
+
+
+def _tokenize(text):
+    return _WORD.findall((text or "").lower())
+
+
+def _rounded(values, digits=2):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def _mean(values, digits):
+    """Mean over the values that could be computed, or None if there are none."""
+    values = values[np.isfinite(values)]
+    return round(float(values.mean()), digits) if len(values) else None
+
+
+def answer_metrics(history, role=None):
+    """
+    Per-answer metrics for every history item, as NumPy arrays of equal length:
+    words, wpm, filler_rate, diversity (type-token ratio), repetition (share of
+    repeated word pairs) and keywords (distinct role keywords used); plus
+    covered / uncovered: the role's keywords used anywhere in the interview or not.
+    Missing or zero response times give wpm NaN; empty answers give NaN rates.
+    """
+    n = len(history)
+    tokens_per_answer = [_tokenize(item.get("answer")) for item in history]
+    lengths = np.fromiter((len(tokens) for tokens in tokens_per_answer), dtype=np.int64, count=n)
+    all_tokens = np.array([token for tokens in tokens_per_answer for token in tokens], dtype=object)
+    owner = np.repeat(np.arange(n), lengths)
+
+    if len(all_tokens):
+        vocab, token_ids = np.unique(all_tokens.astype(str), return_inverse=True)
+    else:
+        vocab, token_ids = np.array([], dtype=str), np.array([], dtype=np.int64)
+    words = lengths.astype(float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Pace, from response time (which includes thinking time, so it reads low)
+        seconds = np.array([item.get("response_time_sec") or np.nan for item in history], dtype=float)
+        seconds[seconds <= 0] = np.nan
+        wpm = words / (seconds / 60.0)
+
+        # Word pairs within one answer: starts of pairs are all tokens but each answer's last
+        same_answer = owner[:-1] == owner[1:] if len(owner) > 1 else np.zeros(0, dtype=bool)
+        pair_first = token_ids[:-1][same_answer]
+        pair_second = token_ids[1:][same_answer]
+        pair_owner = owner[:-1][same_answer]
+
+        # Fillers
+        is_filler = np.isin(vocab, FILLER_WORDS)[token_ids]
+        fillers = np.bincount(owner[is_filler], minlength=n).astype(float)
+        lookup = {word: i for i, word in enumerate(vocab)}
+        for first, second in FILLER_PHRASES:
+            if first in lookup and second in lookup:
+                hits = (pair_first == lookup[first]) & (pair_second == lookup[second])
+                fillers += np.bincount(pair_owner[hits], minlength=n)
+        filler_rate = fillers / words
+
+        # Lexical diversity: distinct (answer, word) pairs per answer
+        distinct = np.unique(owner * len(vocab) + token_ids)
+        diversity = np.bincount(distinct // max(len(vocab), 1), minlength=n) / words
+
+        # Repetition: word pairs that already appeared earlier in the same answer
+        pair_keys = (pair_owner * len(vocab) + pair_first) * len(vocab) + pair_second
+        pairs = np.bincount(pair_owner, minlength=n).astype(float)
+        distinct_pairs = np.bincount(np.unique(pair_keys) // (len(vocab) ** 2 or 1), minlength=n)
+        repetition = (pairs - distinct_pairs) / pairs
+
+    # Role keywords: which vocabulary words start with which stem (stems x vocab)
+    stems = ROLE_KEYWORDS.get(role, ())
+    keywords = np.zeros(n, dtype=np.int64)
+    covered, uncovered = [], list(stems)
+    if stems and len(vocab):
+        single = [stem for stem in stems if " " not in stem]
+        matches = np.char.startswith(vocab.astype(str)[None, :], np.array(single)[:, None])
+        used = np.zeros((n, len(vocab)), dtype=bool)
+        used[owner, token_ids] = True
+        per_answer = used.astype(np.int64) @ matches.T.astype(np.int64) > 0  # answers x stems
+        # Multi-word stems ("data structure") go through the word pairs
+        phrase_hits = []
+        for stem in stems:
+            if " " in stem:
+                first, second = stem.split(" ", 1)
+                hit = np.zeros(n, dtype=bool)
+                if first in lookup:
+                    starts = np.char.startswith(vocab.astype(str), second)[pair_second]
+                    hit[pair_owner[(pair_first == lookup[first]) & starts]] = True
+                phrase_hits.append(hit)
+        if phrase_hits:
+            per_answer = np.column_stack([per_answer] + phrase_hits)
+        ordered = single + [stem for stem in stems if " " in stem]
+        keywords = per_answer.sum(axis=1)
+        anywhere = per_answer.any(axis=0)
+        covered = [stem for stem, hit in zip(ordered, anywhere) if hit]
+        uncovered = [stem for stem, hit in zip(ordered, anywhere) if not hit]
+
+    return {
+        "words": lengths,
+        "wpm": wpm,
+        "filler_rate": filler_rate,
+        "diversity": diversity,
+        "repetition": repetition,
+        "keywords": keywords,
+        "covered": covered,
+        "uncovered": uncovered,
+    }
+
+
+def _flags(words, wpm, filler_rate, diversity, repetition):
+    flags = []
+    if words < SHORT_ANSWER_WORDS:
+        flags.append("short")
+    elif words > LONG_ANSWER_WORDS:
+        flags.append("long")
+    if wpm < SLOW_WPM:
+        flags.append("slow")
+    elif wpm > FAST_WPM:
+        flags.append("fast")
+    if filler_rate > FILLER_RATE_HIGH:
+        flags.append("fillers")
+    if repetition > REPETITION_HIGH:
+        flags.append("repetitive")
+    if diversity < DIVERSITY_LOW and words >= SHORT_ANSWER_WORDS:
+        flags.append("low_variety")
+    return flags
+
+
+def answer_signals(history, role=None, per_answer=False):
+    """
+    Compact signals for a prompt: the latest answer's metrics and flags, the
+    interview-wide averages and keyword coverage, and (per_answer=True) one
+    column per metric over all answers. None for an empty history.
+    """
+    if not history:
+        return None
+    m = answer_metrics(history, role)
+    columns = {
+        "words": [int(v) for v in m["words"]],
+        "wpm": _rounded(m["wpm"], 0),
+        "filler_rate": _rounded(m["filler_rate"], 3),
+        "diversity": _rounded(m["diversity"]),
+        "repetition": _rounded(m["repetition"]),
+        "keywords": [int(v) for v in m["keywords"]],
+    }
+
+    latest = {name: values[-1] for name, values in columns.items()}
+    # NaN compares False, so a metric we couldn't compute never raises a flag
+    latest["flags"] = _flags(*(m[name][-1] for name in ("words", "wpm", "filler_rate", "diversity", "repetition")))
+
+    overall = {
+        "answers": len(history),
+        "avg_words": round(float(m["words"].mean()), 1),
+        "avg_wpm": _mean(m["wpm"], 0),
+        "avg_filler_rate": _mean(m["filler_rate"], 3),
+        "short_answers": int((m["words"] < SHORT_ANSWER_WORDS).sum()),
+    }
+    stems = ROLE_KEYWORDS.get(role)
+    if stems:
+        overall["keyword_coverage"] = round(len(m["covered"]) / len(stems), 2)
+        overall["uncovered_keywords"] = m["uncovered"][:MAX_UNCOVERED_LISTED]
+
+    signals = {"latest": latest, "overall": overall}
+    if per_answer:
+        signals["per_answer"] = columns
+    return signals
@@ -1,13 +1,35 @@
+import os
 import time
-import json
+import uuid
+import html
+import functools
+from dataclasses import asdict
 import streamlit as st
-import streamlit.components.v1 as components
-from streamlit_mic_recorder import speech_to_text
 
-from agent import get_next_question, generate_feedback
+from agent import (
+    get_next_question,
+    stream_next_question,
+    InterviewChat,
+    FeedbackResult,
+    INTERVIEW_COMPLETE,
+)
+from prefetch import QuestionPrefetcher, question_key
+from scoring import AnswerScorer
+from feedback import stream_feedback_map_reduce
+from openers import ROLES, INTERVIEW_TYPES, sample_opener
+from singleflight import flights, flight_key
+from jobs import jobs
+from voice import voice_panel, new_transcript
+from sessions import store
+from memory import Turn, compact_history, plain_history, purge_widget_keys, current_session, manager
+import agent
+import metrics
+import ratelimit
 
 st.set_page_config(page_title="Interview Practice Partner", page_icon="🎤", layout="wide")
 
+metrics.start_exporters_from_env()
+
 # ---------- Global minimal styling ----------
 st.markdown(
     """
@@ -59,193 +81,478 @@ st.markdown(
 )
 
 
-# REPLACE your existing tts_button function with this:
-def tts_button(text, label="🔊 Read question aloud"):
-    if not text:
+def question_args(history=None):
+    return (
+        st.session_state.role,
+        st.session_state.interview_type,
+        plain_history(st.session_state.history if history is None else history),
+        st.session_state.question_number,
+        st.session_state.max_questions,
+    )
+
+
+def begin_interview():
+    """Pick stateless or chat-session question calls for this interview and reset the prefetcher."""
+    if st.session_state.chat_mode:
+        chat = InterviewChat()
+        fetch, stream = chat.get_next_question, chat.stream_next_question
+    else:
+        fetch, stream = get_next_question, stream_next_question
+
+    st.session_state.question_stream = stream
+    st.session_state.prefetcher.shutdown()
+    st.session_state.prefetcher = QuestionPrefetcher(fetch=fetch)
+
+
+# ---------- Interview state ----------
+# Every change to the interview goes through these, so it is also appended
+# to the durable session store and can be resumed after a refresh.
+
+def record(kind, payload=None):
+    store.record(st.session_state.session_id, kind, payload)
+
+
+def show_question(text):
+    st.session_state.current_question = text
+    st.session_state.question_number += 1
+    st.session_state.question_start_time = time.time()
+    record("question", {"number": st.session_state.question_number, "text": text})
+
+
+def finish_interview():
+    st.session_state.status = "finished"
+    st.session_state.current_question = ""
+    st.session_state.question_start_time = None
+    record("finish")
+
+
+def resume_session(state):
+    """Restore a stored interview (see sessions.replay) into session_state."""
+    for key in ("role", "interview_type", "max_questions", "chat_mode", "status",
+                "current_question", "question_number", "question_start_time", "submitted_question"):
+        st.session_state[key] = state[key]
+    st.session_state.history = compact_history(state["history"])
+    if state["feedback"]:
+        st.session_state.feedback = FeedbackResult(**state["feedback"])
+
+    if state["status"] == "in_progress":
+        begin_interview()
+        # Answered or skipped, but the next question never arrived
+        st.session_state.question_pending = state["submitted_question"] == state["question_number"]
+
+
+def question_chunks(prefetcher, stream, *args):
+    """Chunks of the next question: the prefetched result in one piece, else a fresh stream."""
+    # A speculative result from the prefetcher beats streaming a fresh one
+    prefetched = prefetcher.take(*args)
+    if prefetched is not None:
+        text = prefetched.strip()
+        yield INTERVIEW_COMPLETE if INTERVIEW_COMPLETE in text else text
         return
+    yield from stream(*args)
 
-    # 1. Clean up text (replace newlines with spaces to avoid JS errors)
-    # 2. json.dumps ensures quotes are escaped properly
-    safe_text = json.dumps(text.replace("\n", " ").strip())
-
-    html_code = f"""
-    <!DOCTYPE html>
-    <html>
-    <body>
-        <button id="speakBtn" style="
-            padding: 0.4rem 0.9rem;
-            border-radius: 0.75rem;
-            border: 1px solid #cbd5f5;
-            background: #eef2ff;
-            cursor: pointer;
-            margin-bottom: 0.5rem;
-            font-size: 0.9rem;
-            font-family: sans-serif;
-            color: #333;
-        ">
-            {label}
-        </button>
-
-        <script>
-            const btn = document.getElementById("speakBtn");
-            
-            btn.onclick = function() {{
-                // 1. Stop any currently playing audio (CRITICAL FIX)
-                window.speechSynthesis.cancel();
-
-                // 2. Create the utterance
-                const msg = new SpeechSynthesisUtterance({safe_text});
-                
-                // Optional: Set language to US English explicitly
-                msg.lang = 'en-US';
-                msg.rate = 1.0; // Speed: 0.1 to 10
-                msg.pitch = 1.0; // Pitch: 0 to 2
-
-                // 3. Error handling
-                msg.onerror = function(event) {{
-                    console.error("TTS Error:", event);
-                }};
-
-                // 4. Speak
-                window.speechSynthesis.speak(msg);
-                console.log("Speaking:", {safe_text});
-            }};
-        </script>
-    </body>
-    </html>
-    """
 
-    # Increase height slightly to ensure button isn't cut off
-    components.html(html_code, height=70)
+def question_job(key, prefetcher, stream, *args):
+    """Background job: yields the question text so far; the last item is the full text or INTERVIEW_COMPLETE."""
+    # A second request for the same question (double click, rerun racing a
+    # click) attaches to the call already in flight instead of starting another.
+    text = ""
+    for chunk in flights.stream(key, question_chunks, prefetcher, stream, *args):
+        if chunk == INTERVIEW_COMPLETE:
+            yield INTERVIEW_COMPLETE
+            return
+        text += chunk
+        yield text
+
+
+def feedback_job(scorer, role, interview_type, history):
+    """Background job: yields partial FeedbackResults; the last one is complete."""
+    # Usually every answer has already been scored in the background,
+    # leaving only a small aggregation call; any gaps are scored in parallel.
+    precomputed = scorer.collect(history, timeout=30)
+    yield from stream_feedback_map_reduce(role, interview_type, history, precomputed=precomputed)
+
+
+# ---------- Background jobs ----------
+# Model calls run on the shared job pool; session_state only holds job ids.
+JOB_POLL_SEC = 0.5
+
+
+def start_job(slot, name, fn, *args):
+    st.session_state[slot] = jobs.submit(st.session_state.session_id, name, fn, *args)
+
+
+def current_job(slot):
+    """The job whose id is in session_state[slot], or None (clearing the slot if it was lost)."""
+    job_id = st.session_state[slot]
+    job = jobs.poll(st.session_state.session_id, job_id) if job_id else None
+    if job is None:
+        st.session_state[slot] = None
+    return job
+
+
+@st.fragment(run_every=JOB_POLL_SEC)
+def job_progress(slot, render):
+    """Re-render a running job's partial output until it finishes, then rerun the page."""
+    job = current_job(slot)
+    if job is None or job.finished:
+        st.rerun()
+    render(job)
+
 
-# ---------- Voice input widget using browser SpeechRecognition ----------
-def voice_input_widget():
+def render_question_progress(job):
+    if job.progress and job.progress != INTERVIEW_COMPLETE:
+        st.markdown(job.progress + " ▌")
+    else:
+        st.caption(f"Preparing your question… {job.elapsed:.0f}s")
+
+
+def render_feedback_progress(job):
+    # Summary first, then scores, while the rest is still streaming
+    partial = job.progress
+    if partial is None:
+        st.info(f"Analyzing your responses… {job.elapsed:.0f}s")
+        return
+    st.markdown("#### Overall Summary")
+    st.write(partial.overall_summary or "…")
+    if partial.scores:
+        cols = st.columns(4)
+        for col, (key, v) in zip(cols, partial.scores.items()):
+            col.metric(key.replace("_", " ").title(), f"{v:g}/10")
+
+
+# ---------- Panes ----------
+# The in-progress view is split into fragments so a widget interaction
+# reruns only its own pane instead of the whole script.
+
+@functools.lru_cache(maxsize=1024)
+def log_entry_html(idx, question, answer, word_count, response_time):
+    """One log entry as a collapsible HTML block; unchanged entries are never rebuilt."""
+    return (
+        f"<details><summary>Q{idx}: {html.escape(question[:60])}...</summary>"
+        f"<p><b>Your answer:</b> {html.escape(answer)}</p>"
+        f'<p style="font-size: 0.8rem; color: #64748b;">'
+        f"Words: {word_count}, Time: {round(response_time or 0, 1)} sec</p></details>"
+    )
+
+
+@st.fragment
+def log_pane():
+    st.markdown("#### Live Interview Log")
+    if st.session_state.history:
+        # One markdown element for the whole log instead of an expander per answer
+        entries = [
+            log_entry_html(
+                idx, item["question"], item["answer"],
+                item.get("answer_word_count"), item.get("response_time_sec"),
+            )
+            for idx, item in enumerate(st.session_state.history, start=1)
+        ]
+        st.markdown("".join(entries), unsafe_allow_html=True)
+    else:
+        st.caption("Your answers will appear here as you progress.")
+
+
+@st.fragment
+def question_pane():
+    """The current question, untouched by answer-pane reruns."""
+    st.subheader(f"Question {st.session_state.question_number}")
+    st.write(st.session_state.current_question)
+
+
+# A typed draft must stay unchanged this long before its follow-up is prefetched
+PREFETCH_SETTLE_SEC = float(os.getenv("PREFETCH_SETTLE_SEC", 3))
+
+
+def voice_input():
+    """
+    Voice controls: read the question aloud and send back transcripts as they
+    come in. Rendered first in the interview column on every run, pending or
+    not, with the same key, so the component stays mounted for the whole
+    interview and only its arguments change.
     """
-    Adds a button that uses the browser's SpeechRecognition API to
-    transcribe the user's speech and fill the latest Streamlit textarea.
+    pending = st.session_state.question_pending
+    # A new question number also stops any recording of the answer just submitted
+    question_number = st.session_state.question_number + (1 if pending else 0)
+    heard = voice_panel("" if pending else st.session_state.current_question, question_number)
+
+    # Interim (not final) transcripts for this question: the candidate is still speaking
+    st.session_state.voice_recording = (
+        not pending and bool(heard) and heard.get("question") == question_number and not heard.get("final")
+    )
+    transcript = new_transcript(heard, question_number, st.session_state.voice_seen)
+    if transcript is not None and not pending:
+        st.session_state.voice_seen = (heard["mount"], heard["seq"])
+        st.session_state.voice_final = transcript.strip() if heard.get("final") else None
+        # answer_pane creates the text area later in this run, so it shows the transcript
+        st.session_state[f"answer_{question_number}"] = transcript
 
-    Works best in Chrome / Edge.
+
+@st.fragment
+def answer_pane():
     """
-    components.html(
-        """
-        <div>
-          <button id="voice-btn" style="
-              padding: 0.4rem 0.9rem;
-              border-radius: 0.75rem;
-              border: 1px solid #a7f3d0;
-              background: #dcfce7;
-              cursor: pointer;
-              margin-top: 0.25rem;
-              font-size: 0.9rem;
-          ">
-            🎙 Speak your answer
-          </button>
-          <span id="voice-status" style="margin-left: 0.5rem; font-size: 0.85rem; color: #444;"></span>
-        </div>
+    Text answer, prefetch and Submit/Skip. Typing reruns only this fragment;
+    Submit, Skip and voice transcripts rerun the whole page.
+    """
+    question_number = st.session_state.question_number
+    answer_key = f"answer_{question_number}"
+    if answer_key not in st.session_state:
+        st.session_state[answer_key] = ""
+
+    answer = st.text_area(
+        "Your answer (you can speak above or type here):",
+        key=answer_key,
+        height=160,
+    )
 
-        <script>
-            (function() {
-                const btn = document.getElementById('voice-btn');
-                const statusSpan = document.getElementById('voice-status');
-
-                if (!btn) return;
-
-                btn.onclick = async function() {
-                    statusSpan.textContent = '';
-
-                    // Request permission explicitly (sometimes hidden in iframes)
-                    try {
-                        await navigator.mediaDevices.getUserMedia({ audio: true });
-                    } catch (e) {
-                        statusSpan.textContent = " Microphone blocked. Allow mic and retry.";
-                        return;
-                    }
-
-                    const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
-                    if (!SpeechRecognition) {
-                        statusSpan.textContent = ' Speech recognition not supported in this browser.';
-                        return;
-                    }
-
-                    const recognition = new SpeechRecognition();
-                    recognition.lang = 'en-US';
-                    recognition.continuous = false;
-                    recognition.interimResults = false;
-                    recognition.maxAlternatives = 1;
-
-                    recognition.onstart = function() {
-                        statusSpan.textContent = ' 🎤 Listening...';
-                    };
-
-                    recognition.onerror = function(event) {
-                        statusSpan.textContent = '❌ Error: ' + event.error;
-                    };
-
-                    recognition.onend = function() {
-                        if (!statusSpan.textContent.startsWith('❌')) {
-                            statusSpan.textContent = ' ⏹️ Stopped';
-                        }
-                    };
-
-                    recognition.onresult = function(event) {
-                        const transcript = event.results[0][0].transcript;
-                        try {
-                            const textareas = window.parent.document.querySelectorAll('textarea[data-baseweb="textarea"]');
-                            const textarea = textareas[textareas.length - 1];
-                            if (textarea) {
-                                textarea.value = transcript;
-                                textarea.dispatchEvent(new Event('input', { bubbles: true }));
-                                statusSpan.textContent = ' ✔️ Transcribed';
-                            }
-                        } catch (e) {
-                            statusSpan.textContent = ' Could not access parent document.';
-                        }
-                    };
-
-                    recognition.start();
-                };
-            })();
-        </script>
+    # Speculatively prepare the next question while the candidate answers.
+    # Skip is fully determined by the current history. The draft follow-up
+    # waits for the answer to settle: it starts right away for a final voice
+    # transcript, after PREFETCH_SETTLE_SEC without edits for typed text, and
+    # never while the candidate is still speaking. Each edit drops the
+    # previous draft's pending call.
+    if st.session_state.question_number < st.session_state.max_questions:
+        prefetcher = st.session_state.prefetcher
+        keep = [prefetcher.prefetch(*question_args())]
+        if answer.strip() and not st.session_state.voice_recording:
+            draft = {"question": st.session_state.current_question, "answer": answer.strip()}
+            delay = 0 if answer.strip() == st.session_state.voice_final else PREFETCH_SETTLE_SEC
+            keep.append(prefetcher.prefetch(*question_args(st.session_state.history + [draft]), delay=delay))
+        prefetcher.retain(keep)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        if st.button("✅ Submit Answer", use_container_width=True):
+            # Using the variable 'answer' which comes from the text_area above
+            if st.session_state.submitted_question == st.session_state.question_number:
+                pass  # repeat click for a question already handled
+            elif not answer.strip():
+                st.warning("Please enter or speak an answer before submitting.")
+            else:
+                # Compute timing + word count
+                response_time = None
+                if st.session_state.question_start_time is not None:
+                    response_time = time.time() - st.session_state.question_start_time
+
+                clean_answer = answer.strip()
+                st.session_state.submitted_question = st.session_state.question_number
+                st.session_state.history.append(
+                    Turn(
+                        question=st.session_state.current_question,
+                        answer=clean_answer,
+                        answer_word_count=len(clean_answer.split()),
+                        response_time_sec=response_time,
+                    )
+                )
+                st.session_state.scorer.submit(
+                    st.session_state.role,
+                    st.session_state.interview_type,
+                    len(st.session_state.history) - 1,
+                    st.session_state.history[-1],
+                )
+                record("answer", {"number": st.session_state.question_number, "item": dict(st.session_state.history[-1])})
+
+                # Check if interview finished
+                if st.session_state.question_number >= st.session_state.max_questions:
+                    finish_interview()
+                    st.rerun()
+                else:
+                    # The rerun starts generating the next question in the background
+                    st.session_state.question_pending = True
+                    st.rerun()
+
+    with c2:
+        if st.button("⏭️ Skip Question", use_container_width=True):
+            if st.session_state.submitted_question == st.session_state.question_number:
+                pass  # repeat click for a question already handled
+            elif st.session_state.question_number >= st.session_state.max_questions:
+                finish_interview()
+                st.rerun()
+            else:
+                st.session_state.submitted_question = st.session_state.question_number
+                record("skip", {"number": st.session_state.question_number})
+                st.session_state.question_pending = True
+                st.rerun()
+
+
+@st.fragment
+def results_tabs(fb):
+    """Session summary and feedback tabs for a parsed FeedbackResult."""
+    overall_summary = fb.overall_summary
+    scores = fb.scores
+    strengths = fb.strengths
+    gaps = fb.areas_to_improve
+    tasks = fb.next_practice_tasks
+
+    # Header card
+    st.markdown(
+        f"""
+        <div class="result-card">
+            <h4 style="margin-bottom: 0.3rem;">Session Summary</h4>
+            <p style="margin-top: 0.2rem; margin-bottom: 0.4rem; font-size: 0.9rem; color: #475569;">
+                Role: <b>{st.session_state.role}</b> · 
+                Type: <b>{st.session_state.interview_type}</b> ·
+                Questions: <b>{len(st.session_state.history)}</b>
+            </p>
+        </div>
         """,
-        height=80,
+        unsafe_allow_html=True,
+    )
+
+    tab_overview, tab_scores, tab_strengths, tab_practice = st.tabs(
+        ["Overview", "Scores", "Strengths & Gaps", "Practice Plan"]
     )
 
+    # ---- Overview tab ----
+    with tab_overview:
+        st.markdown("#### Overall Summary")
+        st.write(overall_summary or "Summary not available.")
+
+        if scores:
+            st.markdown("#### Snapshot")
+            c1, c2, c3, c4 = st.columns(4)
+            for col, key in zip(
+                [c1, c2, c3, c4],
+                ["communication", "technical_depth", "structure", "confidence"],
+            ):
+                if key in scores:
+                    with col:
+                        st.metric(key.replace("_", " ").title(), f"{scores[key]:g}/10")
+
+    # ---- Scores tab ----
+    with tab_scores:
+        st.markdown("#### Detailed Scores")
+        if not scores:
+            st.info("Scores not available.")
+        else:
+            for key, label in [
+                ("communication", "Communication"),
+                ("technical_depth", "Technical Depth"),
+                ("structure", "Structure"),
+                ("confidence", "Confidence"),
+            ]:
+                if key in scores:
+                    val = scores[key]
+
+                    st.markdown(
+                        f"""
+                        <div class="score-pill">
+                            <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom: 0.25rem;">
+                                <span><b>{label}</b></span>
+                                <span>{val:g}/10</span>
+                            </div>
+                        </div>
+                        """,
+                        unsafe_allow_html=True,
+                    )
+                    st.progress(val / 10.0)
+
+    # ---- Strengths & Gaps tab ----
+    with tab_strengths:
+        col_s, col_g = st.columns(2)
+        with col_s:
+            st.markdown("#### 💪 Strengths")
+            if strengths:
+                for s in strengths:
+                    st.write(f"- {s}")
+            else:
+                st.caption("No strengths identified.")
+        with col_g:
+            st.markdown("#### 🛠 Areas to Improve")
+            if gaps:
+                for g in gaps:
+                    st.write(f"- {g}")
+            else:
+                st.caption("No areas to improve identified.")
+
+    # ---- Practice Plan tab ----
+    with tab_practice:
+        st.markdown("#### 🎯 Suggested Practice Tasks")
+        if tasks:
+            for t in tasks:
+                st.write(f"- {t}")
+        else:
+            st.caption("No specific practice tasks generated.")
+
 
 # ---------- Initialize session state ----------
 if "initialized" not in st.session_state:
     st.session_state.initialized = True
     st.session_state.role = "Software Engineer"
     st.session_state.interview_type = "Mixed"
-    st.session_state.history = []            # list of dicts with Q/A and stats
+    st.session_state.history = []            # memory.Turn records with Q/A and stats
     st.session_state.current_question = ""
     st.session_state.question_number = 0
     st.session_state.max_questions = 5
     st.session_state.status = "not_started"  # "not_started" | "in_progress" | "finished"
     st.session_state.feedback = None
     st.session_state.question_start_time = None
+    st.session_state.question_pending = False  # next question is being generated in the background
+    st.session_state.question_job = None
+    st.session_state.feedback_job = None
+    st.session_state.prefetcher = QuestionPrefetcher()
+    st.session_state.chat_mode = False         # system instruction + chat turns instead of one prompt
+    st.session_state.question_stream = stream_next_question
+    st.session_state.scorer = AnswerScorer()   # per-answer scores computed in the background
+    st.session_state.submitted_question = 0  # last question number submitted or skipped
+    st.session_state.voice_seen = None       # (mount, seq) of the last voice transcript applied
+    st.session_state.voice_recording = False  # interim transcripts arriving for the current question
+    st.session_state.voice_final = None      # text of the last final transcript applied
+
+    # The session id lives in the URL, so a refresh (or a reconnect to another
+    # app process sharing the store) resumes the same interview.
+    st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+    st.query_params["session"] = st.session_state.session_id
+    stored = store.load(st.session_state.session_id)
+    if stored:
+        resume_session(stored)
+
+# Model calls from this run (and its background workers) queue fairly per session
+ratelimit.set_session(st.session_state.session_id)
+
+# Offloaded or evicted under memory pressure: bring the interview back from the store
+if st.session_state.get("offloaded"):
+    st.session_state.offloaded = False
+    stored = store.load(st.session_state.session_id)
+    if stored:
+        resume_session(stored)
+
+purge_widget_keys(st.session_state, st.session_state.question_number)
+manager.touch(st.session_state.session_id, *current_session())
 
 
 # ---------- Sidebar (settings) ----------
 with st.sidebar:
     st.title("⚙️ Session Setup")
 
+    # Defaults come from session_state so a resumed interview shows its own setup
     st.session_state.role = st.selectbox(
         "Role",
-        ["Software Engineer", "Data Analyst", "Sales Associate", "Product Manager"],
-        index=0,
+        ROLES,
+        index=ROLES.index(st.session_state.role) if st.session_state.role in ROLES else 0,
     )
 
     st.session_state.interview_type = st.selectbox(
         "Interview Type",
-        ["Technical", "Behavioral", "Mixed"],
-        index=2,
+        INTERVIEW_TYPES,
+        index=INTERVIEW_TYPES.index(st.session_state.interview_type)
+        if st.session_state.interview_type in INTERVIEW_TYPES else 2,
     )
 
     st.session_state.max_questions = st.slider(
         "Number of Questions",
         min_value=3,
         max_value=10,
-        value=5,
+        value=st.session_state.max_questions,
+    )
+
+    st.session_state.chat_mode = st.checkbox(
+        "Chat session mode",
+        value=st.session_state.chat_mode,
+        help="Send the interviewer instructions as a system instruction and the interview as "
+             "conversation turns. Requests are not smaller: each one still carries the instructions "
+             "and the whole (compacted) conversation.",
+        disabled=st.session_state.status == "in_progress",
     )
 
     st.markdown("---")
@@ -256,8 +563,36 @@ with st.sidebar:
         st.session_state.status = "not_started"
         st.session_state.feedback = None
         st.session_state.question_start_time = None
+        st.session_state.question_pending = False
+        st.session_state.submitted_question = 0
+        st.session_state.prefetcher.retain(())
+        st.session_state.scorer.reset()
+        jobs.discard(st.session_state.session_id)
+        st.session_state.question_job = None
+        st.session_state.feedback_job = None
+        flights.forget(st.session_state.session_id)
+        record("restart")
         st.success("Interview reset.")
 
+    # Operator-only view of model call metrics; enable with SHOW_METRICS=1
+    if os.getenv("SHOW_METRICS") == "1":
+        with st.expander("📈 LLM call metrics"):
+            rows = metrics.registry.summary()
+            if rows:
+                st.table(rows)
+            else:
+                st.caption("No model calls yet.")
+            if agent.router.snapshot():
+                st.caption("Model router")
+                st.table(agent.router.snapshot())
+            if agent.rate_limit_snapshot():
+                st.caption("Rate limits")
+                st.table(agent.rate_limit_snapshot())
+            st.caption("History compaction")
+            st.table([agent.history_compactor.snapshot()])
+            st.caption("Session memory")
+            st.table(manager.report())
+
 
 # ---------- Main Page ----------
 st.title("🎤 AI Interview Practice Partner (Voice-Enabled)")
@@ -285,272 +620,95 @@ if st.session_state.status == "not_started":
     st.info("Click **Start Interview** to begin.")
     if st.button("🚀 Start Interview", type="primary"):
         st.session_state.status = "in_progress"
-        st.session_state.current_question = get_next_question(
-            st.session_state.role,
-            st.session_state.interview_type,
-            st.session_state.history,
-            st.session_state.question_number,
-            st.session_state.max_questions,
-        )
-        st.session_state.question_number += 1
-        st.session_state.question_start_time = time.time()
+        begin_interview()
+        record("start", {
+            "role": st.session_state.role,
+            "interview_type": st.session_state.interview_type,
+            "max_questions": st.session_state.max_questions,
+            "chat_mode": st.session_state.chat_mode,
+        })
+
+        # Openers only depend on the sidebar setup, so use the prebuilt pack when we can
+        opener = sample_opener(st.session_state.role, st.session_state.interview_type)
+        if opener:
+            show_question(opener)
+        else:
+            st.session_state.question_pending = True
 
 # ----- In progress -----
-if st.session_state.status == "in_progress":
-    left, right = st.columns([2, 1])
-
-    with left:
-        st.subheader(f"Question {st.session_state.question_number}")
-        st.write(st.session_state.current_question)
-        tts_button(st.session_state.current_question)   # voice output
-
-        # --- NEW VOICE LOGIC START ---
-        
-        # 1. Define a unique key for the text area based on the question number
-        answer_key = f"answer_{st.session_state.question_number}"
-
-        # 2. Initialize the session state for this answer if not present
-        if answer_key not in st.session_state:
-            st.session_state[answer_key] = ""
-
-        # 3. Voice Input Button (streamlit-mic-recorder)
-        st.write("🎙️ Record your answer:")
-        voice_text = speech_to_text(
-            language='en',
-            start_prompt="Click to Speak",
-            stop_prompt="Stop Recording",
-            just_once=True,
-            key=f"voice_btn_{st.session_state.question_number}"
+if st.session_state.status == "in_progress" and st.session_state.question_pending:
+    job = current_job("question_job")
+    if job is None:
+        args = question_args()
+        key = flight_key(st.session_state.session_id, st.session_state.question_number, question_key(*args))
+        start_job(
+            "question_job", "question", question_job,
+            key, st.session_state.prefetcher, st.session_state.question_stream, *args,
         )
-
-        # 4. If voice text was received, update the text area's session state and rerun
-        if voice_text:
-            st.session_state[answer_key] = voice_text
+    elif job.finished:
+        st.session_state.question_job = None
+        if job.status != "done":
+            st.error(f"Couldn't get the next question: {job.error or job.status}")
+            st.button("🔁 Try again")   # any rerun resubmits
+            st.stop()
+
+        st.session_state.question_pending = False
+        question = (job.result or "").strip()
+        if question == INTERVIEW_COMPLETE:
+            finish_interview()
             st.rerun()
 
-        # 5. The Text Area (Linked to the same key)
-        answer = st.text_area(
-            "Your answer (you can speak above or type here):",
-            key=answer_key,
-            height=160,
-        )
-        # --- NEW VOICE LOGIC END ---
-
-        c1, c2 = st.columns(2)
-        with c1:
-            if st.button("✅ Submit Answer", use_container_width=True):
-                # Using the variable 'answer' which comes from the text_area above
-                if not answer.strip():
-                    st.warning("Please enter or speak an answer before submitting.")
-                else:
-                    # Compute timing + word count
-                    response_time = None
-                    if st.session_state.question_start_time is not None:
-                        response_time = time.time() - st.session_state.question_start_time
-
-                    clean_answer = answer.strip()
-                    st.session_state.history.append(
-                        {
-                            "question": st.session_state.current_question,
-                            "answer": clean_answer,
-                            "answer_word_count": len(clean_answer.split()),
-                            "response_time_sec": response_time,
-                        }
-                    )
+        show_question(question)
 
-                    # Check if interview finished
-                    if st.session_state.question_number >= st.session_state.max_questions:
-                        st.session_state.status = "finished"
-                        st.session_state.current_question = ""
-                        st.session_state.question_start_time = None
-                        st.rerun()
-                    else:
-                        # Get next question
-                        st.session_state.current_question = get_next_question(
-                            st.session_state.role,
-                            st.session_state.interview_type,
-                            st.session_state.history,
-                            st.session_state.question_number,
-                            st.session_state.max_questions,
-                        )
-                        st.session_state.question_number += 1
-                        st.session_state.question_start_time = time.time()
-                        st.rerun()
-
-        with c2:
-            if st.button("⏭️ Skip Question", use_container_width=True):
-                if st.session_state.question_number >= st.session_state.max_questions:
-                    st.session_state.status = "finished"
-                    st.session_state.current_question = ""
-                    st.session_state.question_start_time = None
-                    st.rerun()
-                else:
-                    st.session_state.current_question = get_next_question(
-                        st.session_state.role,
-                        st.session_state.interview_type,
-                        st.session_state.history,
-                        st.session_state.question_number,
-                        st.session_state.max_questions,
-                    )
-                    st.session_state.question_number += 1
-                    st.session_state.question_start_time = time.time()
-                    st.rerun()
+if st.session_state.status == "in_progress":
+    left, right = st.columns([2, 1])
 
     with right:
-        st.markdown("#### Live Interview Log")
-        if st.session_state.history:
-            for idx, item in enumerate(st.session_state.history, start=1):
-                with st.expander(f"Q{idx}: {item['question'][:60]}..."):
-                    st.markdown(f"**Your answer:** {item['answer']}")
-                    st.caption(
-                        f"Words: {item.get('answer_word_count')}, "
-                        f"Time: {round(item.get('response_time_sec') or 0, 1)} sec"
-                    )
-        else:
-            st.caption("Your answers will appear here as you progress.")
+        log_pane()
+
+    with left:
+        voice_input()
+        if st.session_state.question_pending:
+            st.subheader(f"Question {st.session_state.question_number + 1}")
+            job_progress("question_job", render_question_progress)
+            st.stop()   # the answer box appears once the question has arrived
+
+        question_pane()
+        answer_pane()
 
 # ----- Finished -----
 if st.session_state.status == "finished":
     st.subheader("✅ Interview Complete")
 
     if not st.session_state.feedback:
-        if st.button("🧠 Generate Feedback", type="primary"):
-            with st.spinner("Analyzing your responses..."):
-                st.session_state.feedback = generate_feedback(
+        job = current_job("feedback_job")
+        if job is None:
+            if st.button("🧠 Generate Feedback", type="primary"):
+                start_job(
+                    "feedback_job", "feedback", feedback_job,
+                    st.session_state.scorer,
                     st.session_state.role,
                     st.session_state.interview_type,
-                    st.session_state.history,
+                    [dict(item) for item in st.session_state.history],
                 )
-            st.success("Feedback generated!")
+                st.rerun()
+        elif not job.finished:
+            job_progress("feedback_job", render_feedback_progress)
+        else:
+            st.session_state.feedback_job = None
+            if job.status == "done" and job.result is not None:
+                st.session_state.feedback = job.result
+                record("feedback", asdict(job.result))
+                st.success("Feedback generated!")
+            else:
+                st.error(f"Feedback generation failed: {job.error or job.status}. Please try again.")
 
     fb = st.session_state.feedback
 
     if fb:
-        # Try to recover structured JSON even if it came back as raw_text
-        if "raw_text" in fb:
-            raw = fb["raw_text"]
-            parsed = None
-            try:
-                # try direct parse
-                parsed = json.loads(raw)
-            except Exception:
-                try:
-                    # try to extract the JSON object from surrounding text
-                    start = raw.find("{")
-                    end = raw.rfind("}")
-                    if start != -1 and end != -1:
-                        parsed = json.loads(raw[start : end + 1])
-                except Exception:
-                    parsed = None
-
-            if parsed:
-                fb = parsed   # from now on treat as normal structured response
-            else:
-                # last-resort fallback: show as plain text
-                st.markdown("### 📋 Feedback")
-                st.write(raw)
-                st.stop()  # don't run the pretty UI below
-
-        # --------- from here on, fb is expected to be structured JSON ----------
-        overall_summary = fb.get("overall_summary", "")
-        scores = fb.get("scores", {})
-        strengths = fb.get("strengths", [])
-        gaps = fb.get("areas_to_improve", [])
-        tasks = fb.get("next_practice_tasks", [])
-
-        # Header card
-        st.markdown(
-            f"""
-            <div class="result-card">
-                <h4 style="margin-bottom: 0.3rem;">Session Summary</h4>
-                <p style="margin-top: 0.2rem; margin-bottom: 0.4rem; font-size: 0.9rem; color: #475569;">
-                    Role: <b>{st.session_state.role}</b> · 
-                    Type: <b>{st.session_state.interview_type}</b> ·
-                    Questions: <b>{len(st.session_state.history)}</b>
-                </p>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        tab_overview, tab_scores, tab_strengths, tab_practice = st.tabs(
-            ["Overview", "Scores", "Strengths & Gaps", "Practice Plan"]
-        )
-
-        # ---- Overview tab ----
-        with tab_overview:
-            st.markdown("#### Overall Summary")
-            st.write(overall_summary or "Summary not available.")
-
-            if scores:
-                st.markdown("#### Snapshot")
-                c1, c2, c3, c4 = st.columns(4)
-                for col, key in zip(
-                    [c1, c2, c3, c4],
-                    ["communication", "technical_depth", "structure", "confidence"],
-                ):
-                    if key in scores:
-                        with col:
-                            try:
-                                v = float(scores[key])
-                            except Exception:
-                                v = 0
-                            st.metric(key.replace("_", " ").title(), f"{v}/10")
-
-        # ---- Scores tab ----
-        with tab_scores:
-            st.markdown("#### Detailed Scores")
-            if not scores:
-                st.info("Scores not available.")
-            else:
-                for key, label in [
-                    ("communication", "Communication"),
-                    ("technical_depth", "Technical Depth"),
-                    ("structure", "Structure"),
-                    ("confidence", "Confidence"),
-                ]:
-                    if key in scores:
-                        try:
-                            val = float(scores[key])
-                        except Exception:
-                            val = 0.0
-
-                        st.markdown(
-                            f"""
-                            <div class="score-pill">
-                                <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom: 0.25rem;">
-                                    <span><b>{label}</b></span>
-                                    <span>{val}/10</span>
-                                </div>
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-                        st.progress(min(max(val, 0.0), 10.0) / 10.0)
-
-        # ---- Strengths & Gaps tab ----
-        with tab_strengths:
-            col_s, col_g = st.columns(2)
-            with col_s:
-                st.markdown("#### 💪 Strengths")
-                if strengths:
-                    for s in strengths:
-                        st.write(f"- {s}")
-                else:
-                    st.caption("No strengths identified.")
-            with col_g:
-                st.markdown("#### 🛠 Areas to Improve")
-                if gaps:
-                    for g in gaps:
-                        st.write(f"- {g}")
-                else:
-                    st.caption("No areas to improve identified.")
-
-        # ---- Practice Plan tab ----
-        with tab_practice:
-            st.markdown("#### 🎯 Suggested Practice Tasks")
-            if tasks:
-                for t in tasks:
-                    st.write(f"- {t}")
-            else:
-                st.caption("No specific practice tasks generated.")
+        # Feedback is validated once when generated; raw_text means it couldn't be parsed
+        if fb.raw_text is not None:
+            st.markdown("### 📋 Feedback")
+            st.write(fb.raw_text)
+        else:
+            results_tabs(fb)
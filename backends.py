@@ -0,0 +1,74 @@
+# backends.py
+# Where model objects come from. The agent only relies on the small surface
+# of google.generativeai.GenerativeModel it actually uses:
+#   model.generate_content(contents, stream=False, request_options=None)
+#   await model.generate_content_async(contents, request_options=None)
+# returning objects with .text (and .usage_metadata), or an iterable of
+# chunks with .text when streaming. Any backend that provides that can
+# stand in for Gemini.
+#
+# LLM_BACKEND selects one: "gemini" (default), "local" (in-process stand-in)
+# or "http" (stand-in server at STANDIN_URL, see standin.py).
+import os
+
+_genai = None
+_backend = None
+
+
+def get_genai():
+    """
+    Import and configure google.generativeai on first use.
+    The import is slow, so it is kept out of module import time.
+    """
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai = genai
+    return _genai
+
+
+class GeminiBackend:
+    name = "gemini"
+    # None means the agent discovers the model via list_models()
+    fixed_model_name = None
+
+    def list_models(self):
+        """Names of all models that support generateContent."""
+        return [
+            m.name for m in get_genai().list_models()
+            if "generateContent" in m.supported_generation_methods
+        ]
+
+    def create_model(self, model_name, system_instruction=None):
+        return get_genai().GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+def backend_from_env():
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "gemini":
+        return GeminiBackend()
+
+    # Stand-ins are only imported when asked for
+    import standin
+
+    if kind == "local":
+        return standin.LocalBackend.from_env()
+    if kind == "http":
+        return standin.HttpBackend(os.getenv("STANDIN_URL", "http://127.0.0.1:8765"))
+    raise ValueError(f"Unknown LLM_BACKEND: {kind!r} (expected gemini, local or http)")
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = backend_from_env()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the backend for this process, e.g. for benchmarks. Returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
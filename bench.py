@@ -0,0 +1,283 @@
+# bench.py
+# End-to-end latency benchmark for interview turns, run against the offline
+# stand-in backend so results are repeatable.
+#
+#     python bench.py --interviews 20 --profile flash --out bench.json
+#     python bench.py --compare bench_before.json --out bench_after.json
+#
+# Agent phases time get_next_question / generate_feedback directly. The app
+# phase drives app.py through Streamlit's AppTest harness and times each
+# action until its result is on screen, rerunning the script while a question
+# or feedback job runs in the background, as the page's poller would.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+
+os.environ.setdefault("LLM_BACKEND", "local")
+
+import agent
+import backends
+import standin
+from feedback import generate_feedback_map_reduce
+from openers import ROLES, INTERVIEW_TYPES
+
+# How often the app's job poller reruns the page (app.JOB_POLL_SEC)
+APP_POLL_SEC = 0.5
+APP_ACTION_TIMEOUT_SEC = 120
+# Range of the app's "Number of Questions" slider
+APP_QUESTIONS_RANGE = (3, 10)
+
+FILLER = (
+    "so in my last role I worked with the team to improve how we handled this "
+    "and we measured the results every week which helped us learn quickly"
+).split()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values):
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+def fake_answer(rng, words):
+    return " ".join(rng.choice(FILLER) for _ in range(max(1, int(rng.gauss(words, words / 3)))))
+
+
+class PromptRecorder:
+    """Responder wrapper that records prompt size for every stand-in call."""
+
+    def __init__(self, responder=standin.templated_response):
+        self.responder = responder
+        self.sizes = []
+
+    def __call__(self, prompt):
+        self.sizes.append(len(prompt.encode("utf-8")))
+        return self.responder(prompt)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run_agent_phase(args, recorder):
+    rng = random.Random(args.seed)
+    chat = agent.InterviewChat() if args.chat else None
+    next_question = chat.get_next_question if chat else agent.get_next_question
+
+    samples = {"start": [], "turn": [], "skip": [], "feedback": [], "feedback_map_reduce": []}
+    bytes_per_turn = {}
+
+    for _ in range(args.interviews):
+        role = rng.choice(ROLES)
+        interview_type = rng.choice(INTERVIEW_TYPES)
+        history = []
+
+        mark = len(recorder.sizes)
+        elapsed, question = timed(next_question, role, interview_type, history, 0, args.questions)
+        samples["start"].append(elapsed)
+        bytes_per_turn.setdefault(0, []).extend(recorder.sizes[mark:])
+
+        for number in range(1, args.questions):
+            mark = len(recorder.sizes)
+            if rng.random() < args.skip_rate:
+                elapsed, question = timed(next_question, role, interview_type, history, number, args.questions)
+                samples["skip"].append(elapsed)
+            else:
+                answer = fake_answer(rng, args.answer_words)
+                history.append({
+                    "question": question,
+                    "answer": answer,
+                    "answer_word_count": len(answer.split()),
+                    "response_time_sec": round(rng.uniform(20, 120), 1),
+                })
+                elapsed, question = timed(next_question, role, interview_type, history, number, args.questions)
+                samples["turn"].append(elapsed)
+            bytes_per_turn.setdefault(number, []).extend(recorder.sizes[mark:])
+
+        if history:
+            elapsed, _ = timed(agent.generate_feedback, role, interview_type, history)
+            samples["feedback"].append(elapsed)
+            elapsed, _ = timed(generate_feedback_map_reduce, role, interview_type, history)
+            samples["feedback_map_reduce"].append(elapsed)
+
+    return {
+        "latency_sec": {phase: summarize(values) for phase, values in samples.items()},
+        "prompt_bytes_per_turn": {str(n): summarize(sizes) for n, sizes in sorted(bytes_per_turn.items())},
+        "history_compaction": agent.history_compactor.snapshot(),
+    }
+
+
+def run_app_phase(args):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit not installed, skipping the app phase")
+        return None
+
+    rng = random.Random(args.seed)
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    samples = {"cold_run": [], "rerun": [], "start": [], "submit": [], "skip": [], "feedback": []}
+
+    def settle(at):
+        """Rerun until no question or feedback job is pending, like the page's job poller."""
+        deadline = time.monotonic() + APP_ACTION_TIMEOUT_SEC
+        while at.session_state["question_pending"] or at.session_state["feedback_job"]:
+            if at.error:
+                raise RuntimeError(f"app.py reported an error: {at.error[0].value}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"app.py still busy after {APP_ACTION_TIMEOUT_SEC}s")
+            time.sleep(APP_POLL_SEC)
+            at.run()
+
+    def click(at, prefix):
+        """Seconds from clicking the button to its result (question or feedback) being shown."""
+        button = next((b for b in at.button if b.label.startswith(prefix)), None)
+        if button is None:
+            raise RuntimeError(f"No {prefix} button on the page")
+        start = time.perf_counter()
+        button.click().run()
+        settle(at)
+        return time.perf_counter() - start
+
+    for _ in range(args.app_interviews):
+        at = AppTest.from_file(app_path, default_timeout=120)
+        elapsed, _ = timed(at.run)
+        samples["cold_run"].append(elapsed)
+        elapsed, _ = timed(at.run)
+        samples["rerun"].append(elapsed)
+
+        at.slider[0].set_value(args.questions).run()
+        samples["start"].append(click(at, "🚀"))
+        for _ in range(args.questions):
+            if at.session_state["status"] != "in_progress":
+                break
+            if rng.random() < args.skip_rate:
+                samples["skip"].append(click(at, "⏭️"))
+            else:
+                at.text_area[0].input(fake_answer(rng, args.answer_words))
+                samples["submit"].append(click(at, "✅"))
+
+        if at.session_state["status"] != "finished":
+            raise RuntimeError(f"Interview not finished after {args.questions} questions "
+                               f"(status {at.session_state['status']!r})")
+        samples["feedback"].append(click(at, "🧠"))
+
+    return {"latency_sec": {phase: summarize(values) for phase, values in samples.items()}}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(title, stats, unit_scale=1000.0, unit="ms"):
+    print(f"\n{title}")
+    print(f"  {'phase':<22}{'n':>5}{'p50':>10}{'p95':>10}{'p99':>10}  ({unit})")
+    for name, s in stats.items():
+        if not s.get("n"):
+            continue
+        print(
+            f"  {name:<22}{s['n']:>5}"
+            f"{s['p50'] * unit_scale:>10.1f}{s['p95'] * unit_scale:>10.1f}{s['p99'] * unit_scale:>10.1f}"
+        )
+
+
+def print_compaction(totals):
+    print("\nHistory compaction")
+    print(f"  {totals['compacted_calls']} of {totals['calls']} prompts compacted")
+    if totals["tokens_before"]:
+        share = totals["tokens_saved"] / totals["tokens_before"] * 100
+        print(f"  saved {totals['bytes_saved']} bytes / ~{totals['tokens_saved']} tokens ({share:.1f}% of history)")
+
+
+def compare(before, after):
+    """Print p50/p95 change for every phase present in both runs."""
+    print("\nChange vs baseline (p50 / p95):")
+    for section in ("agent", "app"):
+        old = (before.get(section) or {}).get("latency_sec", {})
+        new = (after.get(section) or {}).get("latency_sec", {})
+        for phase in new:
+            if old.get(phase, {}).get("n") and new[phase].get("n"):
+                deltas = [
+                    (new[phase][p] - old[phase][p]) / old[phase][p] * 100 if old[phase][p] else 0.0
+                    for p in ("p50", "p95")
+                ]
+                print(f"  {section}.{phase:<22}{deltas[0]:+8.1f}%{deltas[1]:+8.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency benchmark for interview turns.")
+    parser.add_argument("--interviews", type=int, default=20, help="agent-level interviews to run")
+    parser.add_argument("--app-interviews", type=int, default=3, help="interviews driven through app.py (0 to skip)")
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--answer-words", type=int, default=80, help="mean words per synthetic answer")
+    parser.add_argument("--skip-rate", type=float, default=0.2)
+    parser.add_argument("--profile", choices=sorted(standin.PROFILES), default="flash")
+    parser.add_argument("--chat", action="store_true", help="use chat session mode for questions")
+    parser.add_argument("--with-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args(argv)
+    if args.app_interviews and not APP_QUESTIONS_RANGE[0] <= args.questions <= APP_QUESTIONS_RANGE[1]:
+        parser.error("--questions must be between {} and {} for the app phase".format(*APP_QUESTIONS_RANGE))
+
+    agent.RESPONSE_CACHE_ENABLED = args.with_cache
+    recorder = PromptRecorder()
+    backends.set_backend(standin.LocalBackend(args.profile, responder=recorder, seed=args.seed))
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": int(time.time()),
+            "profile": args.profile,
+            "args": vars(args),
+        },
+        "agent": run_agent_phase(args, recorder),
+        "app": run_app_phase(args) if args.app_interviews else None,
+    }
+
+    print_table("Agent calls", results["agent"]["latency_sec"])
+    print_table("Prompt bytes per turn", results["agent"]["prompt_bytes_per_turn"], 1.0, "bytes")
+    print_compaction(results["agent"]["history_compaction"])
+    if results["app"]:
+        print_table("app.py script runs (AppTest)", results["app"]["latency_sec"])
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# compaction.py
+# Keeps the history sent to the model under a token budget by folding older
+# Q/A pairs into a rolling summary while the latest pairs stay verbatim.
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def brief_summary(previous_summary, item, max_answer_words=25):
+    """
+    Default summariser: append one short line for `item` to the running summary.
+    Cheap and local, so folding never costs an extra API call.
+    """
+    words = item.get("answer", "").split()
+    answer = " ".join(words[:max_answer_words])
+    if len(words) > max_answer_words:
+        answer += " ..."
+
+    line = f"Q: {item.get('question', '')} | A ({len(words)} words): {answer}"
+    return f"{previous_summary}\n{line}" if previous_summary else line
+
+
+class HistoryCompactor:
+    """
+    Compacts interview history to fit a token budget.
+
+    - The last `keep_recent` Q/A pairs are always kept verbatim.
+    - Older pairs are folded one at a time with `summarize(previous_summary, item)`.
+      Each fold is cached by a hash chain over the folded Q/A text, so a new
+      turn only folds the pairs that weren't folded before.
+    - Safe to share across sessions and prefetch threads.
+    """
+
+    def __init__(self, budget_tokens=2000, keep_recent=3, summarize=brief_summary, cache_size=2048):
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._folds = OrderedDict()  # chain hash -> summary after folding up to that item
+        self.totals = {
+            "calls": 0,
+            "compacted_calls": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+        }
+
+    def _fold(self, items):
+        chain = ""
+        summary = ""
+        for item in items:
+            link = json.dumps([chain, item.get("question", ""), item.get("answer", "")])
+            chain = hashlib.sha1(link.encode("utf-8")).hexdigest()
+
+            with self._lock:
+                cached = self._folds.get(chain)
+                if cached is not None:
+                    self._folds.move_to_end(chain)
+
+            if cached is None:
+                cached = self.summarize(summary, item)
+                with self._lock:
+                    self._folds[chain] = cached
+                    while len(self._folds) > self.cache_size:
+                        self._folds.popitem(last=False)
+            summary = cached
+        return summary
+
+    def compact(self, history, budget_tokens=None):
+        """
+        Returns (summary, recent_history, stats).
+        summary is None when the history already fits the budget.
+        A budget of None uses the compactor default; 0 or less disables compaction.
+        """
+        budget = self.budget_tokens if budget_tokens is None else budget_tokens
+
+        sizes = [len(json.dumps(item)) for item in history]
+        bytes_before = len(json.dumps(history))
+        summary = None
+        recent = history
+
+        foldable = len(history) - self.keep_recent
+        if budget and budget > 0 and foldable > 0 and estimate_tokens(json.dumps(history)) > budget:
+            for n in range(1, foldable + 1):
+                # json.dumps(list) = items joined by ", " inside brackets
+                tail_bytes = sum(sizes[n:]) + 2 * max(len(sizes) - n - 1, 0) + 2
+                summary = self._fold(history[:n])
+                if estimate_tokens(summary) + (tail_bytes + 3) // 4 <= budget:
+                    break
+            recent = history[n:]
+
+        bytes_after = len(json.dumps(recent)) + (len(json.dumps(summary)) if summary else 0)
+        stats = {
+            "turns": len(history),
+            "folded_turns": len(history) - len(recent),
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "bytes_saved": bytes_before - bytes_after,
+            "tokens_before": estimate_tokens(json.dumps(history)),
+            "tokens_after": (bytes_after + 3) // 4,
+        }
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+
+        with self._lock:
+            self.totals["calls"] += 1
+            self.totals["compacted_calls"] += summary is not None
+            self.totals["bytes_before"] += stats["bytes_before"]
+            self.totals["bytes_after"] += stats["bytes_after"]
+            self.totals["tokens_before"] += stats["tokens_before"]
+            self.totals["tokens_after"] += stats["tokens_after"]
+
+        return summary, recent, stats
+
+    def snapshot(self):
+        """Totals since start-up, with what was saved, for the debug panel and the benchmark."""
+        with self._lock:
+            totals = dict(self.totals)
+        totals["bytes_saved"] = totals["bytes_before"] - totals["bytes_after"]
+        totals["tokens_saved"] = totals["tokens_before"] - totals["tokens_after"]
+        return totals
@@ -0,0 +1,86 @@
+# feedback.py
+# Map-reduce feedback: score every Q/A pair concurrently, then run one small
+# aggregation call. Wall-clock scales with the slowest pair, not the transcript.
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from agent import score_answer, aggregate_feedback, generate_feedback, stream_aggregate_feedback, stream_feedback
+
+MAP_MAX_WORKERS = 4
+MAP_CALL_TIMEOUT_SEC = 30
+
+
+def score_all(role, interview_type, history, precomputed=None,
+              max_workers=MAP_MAX_WORKERS, call_timeout=MAP_CALL_TIMEOUT_SEC, score=score_answer):
+    """
+    Map step. Returns a list aligned with history with one score_answer result
+    per pair (None where scoring failed or timed out).
+    precomputed: optional aligned list of results that don't need scoring again
+    """
+    results = list(precomputed) if precomputed else [None] * len(history)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feedback-map")
+    futures = {
+        executor.submit(contextvars.copy_context().run, score, role, interview_type, history[i], call_timeout): i
+        for i in missing
+    }
+
+    # Each request carries its own deadline; this backstop covers queued
+    # calls when there are more pairs than workers.
+    waves = -(-len(missing) // max_workers)
+    done, _ = wait(futures, timeout=call_timeout * waves + 1)
+    # Don't block on stragglers; they finish in the background and are dropped.
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for future in done:
+        i = futures[future]
+        if future.exception() is not None:
+            print(f"[feedback.py] Scoring Q{i + 1} failed: {future.exception()!r}")
+        else:
+            results[i] = future.result()
+    return results
+
+
+def generate_feedback_map_reduce(role, interview_type, history, precomputed=None,
+                                 max_workers=MAP_MAX_WORKERS, call_timeout=MAP_CALL_TIMEOUT_SEC):
+    """
+    history: list of {"question": str, "answer": str}
+    Returns: FeedbackResult (same as generate_feedback)
+    """
+    if not history:
+        return generate_feedback(role, interview_type, history)
+
+    answer_scores = score_all(
+        role, interview_type, history, precomputed, max_workers, call_timeout
+    )
+
+    # Nothing scored at all: the reduce step would just see the raw transcript
+    if all(result is None for result in answer_scores):
+        return generate_feedback(role, interview_type, history)
+
+    return aggregate_feedback(role, interview_type, history, answer_scores)
+
+
+def stream_feedback_map_reduce(role, interview_type, history, precomputed=None,
+                               max_workers=MAP_MAX_WORKERS, call_timeout=MAP_CALL_TIMEOUT_SEC):
+    """
+    Streaming variant of generate_feedback_map_reduce. The map step runs to
+    completion first; the reduce step yields partial FeedbackResults, the
+    last one complete.
+    """
+    if not history:
+        yield from stream_feedback(role, interview_type, history)
+        return
+
+    answer_scores = score_all(
+        role, interview_type, history, precomputed, max_workers, call_timeout
+    )
+
+    if all(result is None for result in answer_scores):
+        yield from stream_feedback(role, interview_type, history)
+        return
+
+    yield from stream_aggregate_feedback(role, interview_type, history, answer_scores)
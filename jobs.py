@@ -0,0 +1,158 @@
+# jobs.py
+# Background jobs for model calls started from the UI. The script thread
+# submits a job and returns straight away; the page polls it, showing the
+# partial output, and reruns once it finishes. One worker pool serves every
+# session in the process.
+import os
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import registry
+
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", 8))
+
+# Finished jobs nobody collected are dropped after this long
+JOB_RESULT_TTL_SEC = 10 * 60
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's thread when it notices it was cancelled."""
+
+
+class Job:
+    """
+    One unit of background work. status is queued, running, done, failed or
+    cancelled. For generator functions every yielded item becomes `progress`
+    and the last one is the result.
+    """
+
+    def __init__(self, session_id, name):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.name = name
+        self.status = "queued"
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.submitted_at
+
+
+class JobQueue:
+    """
+    submit() / poll() / cancel() for background jobs, with results kept per
+    session until collected, discarded or expired. Safe to share across threads.
+    """
+
+    def __init__(self, max_workers=JOB_MAX_WORKERS, ttl_sec=JOB_RESULT_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+        self._lock = threading.Lock()
+        self._sessions = {}  # session_id -> {job_id: Job}
+
+    def _report(self):
+        with self._lock:
+            jobs = [job for session in self._sessions.values() for job in session.values()]
+        for status in ("queued", "running"):
+            registry.set_gauge("interview_jobs", {"status": status}, sum(job.status == status for job in jobs),
+                               "Background jobs by status.")
+
+    def _expire(self):
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            for job_id, job in list(session.items()):
+                if job.finished and now - job.finished_at > self.ttl_sec:
+                    del session[job_id]
+            if not session:
+                del self._sessions[session_id]
+
+    def _run(self, job, fn, args, kwargs):
+        if job._cancel.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.monotonic()
+            return
+        job.status = "running"
+        self._report()
+        try:
+            result = fn(*args, **kwargs)
+            if hasattr(result, "__next__"):
+                try:
+                    for item in result:
+                        if job._cancel.is_set():
+                            raise JobCancelled()
+                        job.progress = item
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+                result = job.progress
+            if job._cancel.is_set():
+                raise JobCancelled()
+            job.result = result
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"[jobs.py] Job {job.name} failed: {e!r}")
+            job.error = e
+            job.status = "failed"
+        finally:
+            job.finished_at = time.monotonic()
+            registry.observe("interview_job_seconds", {"name": job.name, "status": job.status}, job.elapsed,
+                             (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120), "Background job time, queueing included.")
+            self._report()
+
+    def submit(self, session_id, name, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool for this session. Returns the job id."""
+        job = Job(session_id, name)
+        with self._lock:
+            self._expire()
+            self._sessions.setdefault(session_id, {})[job.id] = job
+        # Run in a copy of the caller's context so calls stay attributed to its session
+        job.future = self._executor.submit(contextvars.copy_context().run, self._run, job, fn, args, kwargs)
+        self._report()
+        return job.id
+
+    def poll(self, session_id, job_id):
+        """The Job, or None if this session has no such job (or it expired)."""
+        with self._lock:
+            return self._sessions.get(session_id, {}).get(job_id)
+
+    def cancel(self, session_id, job_id):
+        """
+        Cancel a job. A queued job never starts; a running generator stops at
+        its next item. A call already in flight finishes, but its result is dropped.
+        """
+        job = self.poll(session_id, job_id)
+        if job is None or job.finished:
+            return
+        job._cancel.set()
+        if job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.monotonic()
+            self._report()
+
+    def discard(self, session_id):
+        """Cancel and forget every job of a session."""
+        with self._lock:
+            session = self._sessions.pop(session_id, {})
+        for job in session.values():
+            job._cancel.set()
+            if job.future is not None:
+                job.future.cancel()
+        self._report()
+
+
+jobs = JobQueue()
@@ -0,0 +1,92 @@
+# jsonstream.py
+# Incremental parser for one JSON object arriving in chunks, so fields can
+# be used as soon as they are complete instead of after the whole response.
+import re
+import json
+
+_PARTIAL_STRING_MEMBER = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)$', re.S)
+
+
+class IncrementalObjectParser:
+    """
+    feed() chunks of a streamed JSON object (leading prose or code fences are
+    skipped). After each feed:
+    - fields: every top-level member completed so far
+    - partial: (key, text so far) for a string member still being streamed, or None
+    - done: True once the closing brace has arrived
+    Each character is scanned once, however the text is chunked.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.partial = None
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk):
+        self._buf += chunk
+        buf = self._buf
+
+        for i in range(self._pos, len(buf)):
+            if self.done:
+                break
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = i + 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(buf[self._member_start:i])
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._finish_member(buf[self._member_start:i])
+                self._member_start = i + 1
+
+        self._pos = len(buf)
+        self._update_partial()
+        return self.fields
+
+    def _finish_member(self, text):
+        if not text.strip():
+            return
+        try:
+            self.fields.update(json.loads("{" + text + "}"))
+        except json.JSONDecodeError:
+            # Malformed member; the final full parse will report it
+            pass
+
+    def _update_partial(self):
+        self.partial = None
+        if self.done or not self._in_string or self._depth != 1:
+            return
+        match = _PARTIAL_STRING_MEMBER.match(self._buf[self._member_start:])
+        if match:
+            # A value cut inside an escape sequence doesn't match until the next chunk
+            key, value = match.groups()
+            try:
+                self.partial = (json.loads(f'"{key}"'), json.loads(f'"{value}"'))
+            except json.JSONDecodeError:
+                self.partial = None
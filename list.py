@@ -1,11 +1,12 @@
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
+import sys
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from agent import list_generate_models, get_model_name
+
+# Pass --refresh to re-run discovery and update the cached model choice.
+refresh = "--refresh" in sys.argv
 
 print("Available models with generateContent support:\n")
-for m in genai.list_models():
-    if "generateContent" in m.supported_generation_methods:
-        print(m.name)
+for name in list_generate_models():
+    print(name)
+
+print(f"\nModel used by the app: {get_model_name(refresh=refresh)}")
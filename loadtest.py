@@ -0,0 +1,377 @@
+# loadtest.py
+# Concurrent-session load test for app.py.
+#
+# Simulates N browser sessions talking to a running Streamlit server over its
+# websocket protocol (start, answer by text, skip, generate feedback) and
+# steps N up to find where the synchronous LLM calls in the script thread
+# saturate the process. Needs streamlit (for its protobuf classes), the
+# websockets client (requirements-dev.txt) and Linux /proc for server memory
+# and thread counts.
+#
+#     pip install -r requirements-dev.txt
+#     python loadtest.py --sessions 1 2 4 8 16 32 --profile flash --out load.json
+#
+# By default the server is launched here with the offline stand-in backend;
+# pass --url and --pid to measure an instance you started yourself.
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import contextlib
+import subprocess
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from bench import summarize, fake_answer
+
+START_LABEL = "🚀 Start Interview"
+SUBMIT_LABEL = "✅ Submit Answer"
+SKIP_LABEL = "⏭️ Skip Question"
+FEEDBACK_LABEL = "🧠 Generate Feedback"
+RETRY_LABEL = "🔁 Try again"
+
+# Text that marks the feedback as shown, or a failed background job
+FEEDBACK_SHOWN = ("Session Summary", "📋 Feedback")
+JOB_FAILED = ("Couldn't get the next question", "Feedback generation failed")
+
+# Fallback poll interval when the app hasn't announced one (app.JOB_POLL_SEC)
+POLL_SEC = 0.5
+
+
+class SessionFailed(Exception):
+    """A simulated session couldn't go on: the app didn't show what it expected, or the socket failed."""
+
+
+def read_proc_status(pid):
+    """(rss_bytes, threads) of a process from /proc, or (None, None)."""
+    rss = threads = None
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, threads
+
+
+class ProcSampler:
+    """Polls a process's RSS and thread count in the background."""
+
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.samples.append(read_proc_status(self.pid))
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+    def peak(self):
+        rss = [r for r, _ in self.samples if r is not None]
+        threads = [t for _, t in self.samples if t is not None]
+        return (max(rss) if rss else None), (max(threads) if threads else None)
+
+
+class StreamlitSession:
+    """
+    Minimal Streamlit websocket client: sends rerun requests with widget
+    states and waits for each script run to finish, tracking the widgets
+    and text the app rendered so buttons can be "clicked" by label.
+
+    Like the browser, it reruns run_every fragments (the app's job pollers)
+    while waiting for background work to show up on the page.
+    """
+
+    def __init__(self, url, timeout=120):
+        self.url = url
+        self.timeout = timeout
+        self.conn = None
+        self.widgets = {}    # label -> (element type, widget id)
+        self.texts = []      # markdown, heading and alert bodies
+        self.fragments = {}  # fragment id -> rerun interval (sec), for run_every fragments
+
+    async def connect(self):
+        ws_url = self.url.replace("http://", "ws://").replace("https://", "wss://").rstrip("/")
+        self.conn = await websockets.connect(ws_url + "/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.conn is not None:
+            await self.conn.close()
+
+    async def rerun(self, widget_states=(), fragment_id=None):
+        """
+        Ask for a script run (or a run of one fragment) and wait until it and
+        any st.rerun follow-ups finish.
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+        await self.conn.send(msg.SerializeToString())
+
+        while True:
+            try:
+                raw = await asyncio.wait_for(self.conn.recv(), self.timeout)
+            except websockets.ConnectionClosed as e:
+                raise SessionFailed(f"Streamlit closed the websocket: {e}") from e
+            except asyncio.TimeoutError as e:
+                raise SessionFailed(f"No reply from Streamlit within {self.timeout}s") from e
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+
+            if kind == "new_session":
+                # A full script run starts; fragment runs only add to the page
+                self.widgets, self.texts, self.fragments = {}, [], {}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                el_type = element.WhichOneof("type")
+                widget = getattr(element, el_type, None)
+                if widget is not None and hasattr(widget, "id") and hasattr(widget, "label"):
+                    self.widgets[widget.label] = (el_type, widget.id)
+                elif el_type in ("markdown", "heading", "alert"):
+                    self.texts.append(widget.body)
+            elif kind == "auto_rerun":
+                self.fragments[fwd.auto_rerun.fragment_id] = fwd.auto_rerun.interval
+            elif kind == "stop_auto_rerun":
+                for fragment_id in fwd.stop_auto_rerun.fragment_ids:
+                    self.fragments.pop(fragment_id, None)
+            elif kind == "script_finished":
+                if fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    def has(self, label):
+        return label in self.widgets
+
+    def shows(self, snippets):
+        return any(snippet in text for text in self.texts for snippet in snippets)
+
+    async def wait_for(self, ready, what):
+        """
+        Poll until ready() is true, rerunning the page's run_every fragments
+        (or the whole page, if there are none) the way the browser does.
+        Raises SessionFailed if a job fails or nothing shows up in time.
+        """
+        deadline = time.monotonic() + self.timeout
+        while not ready():
+            if self.has(RETRY_LABEL) or self.shows(JOB_FAILED):
+                raise SessionFailed(f"the app reported an error while waiting for {what}")
+            if time.monotonic() > deadline:
+                raise SessionFailed(f"{what} didn't appear within {self.timeout}s")
+            fragment_id, interval = next(iter(self.fragments.items()), (None, POLL_SEC))
+            await asyncio.sleep(interval)
+            await self.rerun(fragment_id=fragment_id)
+
+    async def click(self, label, text=None):
+        """Click the button `label`, optionally with `text` typed into the answer box."""
+        if label not in self.widgets:
+            raise SessionFailed(f"{label!r} is not on the page")
+        states = []
+        if text is not None:
+            area = next((wid for lbl, (t, wid) in self.widgets.items() if t == "text_area"), None)
+            if area is not None:
+                states.append(WidgetState(id=area, string_value=text))
+        states.append(WidgetState(id=self.widgets[label][1], trigger_value=True))
+        await self.rerun(states)
+
+
+async def run_session(url, args, rng, samples):
+    session = StreamlitSession(url, timeout=args.timeout)
+
+    def question_or_end():
+        return session.has(SUBMIT_LABEL) or session.has(FEEDBACK_LABEL)
+
+    def feedback_shown():
+        return session.shows(FEEDBACK_SHOWN)
+
+    async def step(phase, click, ready, what):
+        """Time one action from the click until its result is on the page."""
+        start = time.perf_counter()
+        await click
+        await session.wait_for(ready, what)
+        samples.setdefault(phase, []).append(time.perf_counter() - start)
+
+    try:
+        await session.connect()
+        start = time.perf_counter()
+        await session.rerun()
+        samples.setdefault("load", []).append(time.perf_counter() - start)
+        await step("start", session.click(START_LABEL), question_or_end, "the first question")
+
+        for _ in range(args.questions):
+            if not session.has(SUBMIT_LABEL):
+                break
+            if rng.random() < args.skip_rate:
+                await step("skip", session.click(SKIP_LABEL), question_or_end, "the next question")
+            else:
+                answer = fake_answer(rng, args.answer_words)
+                await step("submit", session.click(SUBMIT_LABEL, answer), question_or_end, "the next question")
+
+        # Every interview has to end at the feedback button and show feedback
+        await step("feedback", session.click(FEEDBACK_LABEL), feedback_shown, "the feedback")
+        return True
+    except (SessionFailed, OSError) as e:
+        print(f"  session failed: {e!r}")
+        return False
+    finally:
+        await session.close()
+
+
+async def check_server(url):
+    """Fail fast, before any level runs, if a session can't even load the start page."""
+    session = StreamlitSession(url)
+    try:
+        await session.connect()
+        await session.rerun()
+        if not session.has(START_LABEL):
+            raise SessionFailed(f"{START_LABEL!r} is not on the page")
+    except (SessionFailed, OSError) as e:
+        raise RuntimeError(f"Can't drive the app at {url}: {e!r}") from e
+    finally:
+        await session.close()
+
+
+async def run_level(url, pid, n, args):
+    rng = random.Random(args.seed + n)
+    samples = {}
+    rss_before, threads_before = read_proc_status(pid) if pid else (None, None)
+
+    sampler = ProcSampler(pid) if pid else None
+    start = time.perf_counter()
+    with sampler or contextlib.nullcontext():
+        ok = await asyncio.gather(*(
+            run_session(url, args, random.Random(rng.random()), samples) for _ in range(n)
+        ))
+    wall = time.perf_counter() - start
+
+    actions = sum(len(v) for v in samples.values())
+    rss_peak, threads_peak = sampler.peak() if sampler else (None, None)
+    rss_after, _ = read_proc_status(pid) if pid else (None, None)
+
+    result = {
+        "sessions": n,
+        "completed": sum(ok),
+        "wall_sec": wall,
+        "actions_per_sec": actions / wall if wall else None,
+        "latency_sec": {phase: summarize(values) for phase, values in samples.items()},
+        "server": {
+            "rss_before": rss_before,
+            "rss_peak": rss_peak,
+            "rss_after": rss_after,
+            "rss_per_session": (rss_after - rss_before) / n if rss_after and rss_before else None,
+            "threads_before": threads_before,
+            "threads_peak": threads_peak,
+        },
+    }
+
+    all_latencies = [v for values in samples.values() for v in values]
+    overall = summarize(all_latencies)
+    mem = result["server"]["rss_per_session"]
+    print(
+        f"N={n:<4} done={sum(ok):<4} {result['actions_per_sec'] or 0:7.2f} actions/s  "
+        f"p50={overall.get('p50', 0) * 1000:7.0f}ms  p95={overall.get('p95', 0) * 1000:7.0f}ms  "
+        f"p99={overall.get('p99', 0) * 1000:7.0f}ms  "
+        f"threads<={threads_peak}  rss/session={(mem or 0) / 1024:.0f}KiB"
+    )
+    return result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch_server(args):
+    port = free_port()
+    env = dict(os.environ, LLM_BACKEND="local", STANDIN_PROFILE=args.profile, RESPONSE_CACHE="0")
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--browser.gatherUsageStats", "false",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/_stcore/health", timeout=1):
+                return proc, url
+        except OSError:
+            time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("Streamlit server did not become healthy within 60s")
+
+
+async def main_async(args):
+    proc = None
+    url, pid = args.url, args.pid
+    if url is None:
+        proc, url = launch_server(args)
+        pid = proc.pid
+        print(f"Started streamlit (pid {pid}) at {url} with stand-in profile {args.profile!r}")
+
+    try:
+        await check_server(url)
+        levels = []
+        for n in args.sessions:
+            levels.append(await run_level(url, pid, n, args))
+        return {"url": url, "profile": args.profile, "args": vars(args), "levels": levels}
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--url", help="existing server to test (default: launch one)")
+    parser.add_argument("--pid", type=int, help="server pid for memory/thread stats when using --url")
+    parser.add_argument("--profile", default="flash", help="stand-in profile for a launched server")
+    parser.add_argument("--questions", type=int, default=5, help="max questions (app default)")
+    parser.add_argument("--answer-words", type=int, default=80)
+    parser.add_argument("--skip-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for each action's result")
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# memory.py
+# Keeps per-session server memory bounded: compact history records, cleanup
+# of stale per-question widget keys, offloading finished interviews to the
+# session store, and evicting idle sessions when the process goes over its
+# memory budget. Offloaded and evicted sessions reload from the store
+# (sessions.py) the next time they run.
+import os
+import re
+import sys
+import time
+import types
+import weakref
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Executor
+
+from metrics import registry
+from sessions import store
+
+SESSION_MEMORY_BUDGET_BYTES = int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", 512)) * 1024 * 1024)
+SESSION_IDLE_SEC = float(os.getenv("SESSION_IDLE_SEC", 15 * 60))
+SESSION_OFFLOAD_SEC = float(os.getenv("SESSION_OFFLOAD_SEC", 5 * 60))
+ENFORCE_INTERVAL_SEC = 30.0
+
+# Session state that can always be rebuilt from the store
+RELOADABLE_KEYS = ("history", "feedback")
+
+_ANSWER_KEY = re.compile(r"answer_(\d+)$")
+
+
+# ---- Compact history ----
+
+class Turn(Mapping):
+    """
+    One answered question. Reads like the {"question", "answer",
+    "answer_word_count", "response_time_sec"} dict it replaces (item["answer"],
+    item.get(...), dict(item)) at a fraction of the size; question text is
+    interned, so sessions that got the same question share one string.
+    """
+
+    __slots__ = ("question", "answer", "answer_word_count", "response_time_sec")
+
+    def __init__(self, question, answer, answer_word_count=None, response_time_sec=None):
+        self.question = sys.intern(question)
+        self.answer = answer
+        self.answer_word_count = answer_word_count
+        self.response_time_sec = response_time_sec
+
+    @classmethod
+    def from_item(cls, item):
+        if isinstance(item, cls):
+            return item
+        return cls(item["question"], item["answer"], item.get("answer_word_count"), item.get("response_time_sec"))
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"Turn({dict(self)!r})"
+
+
+def compact_history(history):
+    return [Turn.from_item(item) for item in history]
+
+
+def plain_history(history):
+    """Plain dicts, for anything that serializes history (prompts, the session store)."""
+    return [dict(item) for item in history]
+
+
+def purge_widget_keys(state, question_number):
+    """Drop answer_{n} text-area keys of questions other than the current one. Returns how many."""
+    # Streamlit's underlying state object only lists user keys via filtered_state
+    keys = list(getattr(state, "filtered_state", state))
+    stale = [key for key in keys
+             if (match := _ANSWER_KEY.match(str(key))) and int(match.group(1)) != question_number]
+    for key in stale:
+        del state[key]
+    return len(stale)
+
+
+# ---- Accounting ----
+
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType,
+               types.BuiltinFunctionType, threading.Thread, Executor, weakref.ref)
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Approximate bytes reachable from obj. Threads, executors, locks, functions
+    and modules are not counted; shared objects are counted once.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _SKIP_TYPES) or type(obj).__module__ == "_thread":
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def current_session():
+    """
+    (runtime session id, state) of the running session, or (None, None).
+    The state is the session's own SessionState, which lives as long as the
+    session and (unlike the st.session_state proxy) can be read and changed
+    from other threads; ctx.session_state only wraps it for one script run.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None, None
+    return ctx.session_id, getattr(ctx.session_state, "_state", ctx.session_state)
+
+
+def session_connected(runtime_id):
+    """False once the Streamlit runtime no longer has the session connected."""
+    from streamlit.runtime import Runtime
+
+    if runtime_id is None or not Runtime.exists():
+        return True
+    return Runtime.instance().is_active_session(runtime_id)
+
+
+# ---- Manager ----
+
+class SessionMemoryManager:
+    """
+    Process-wide view of live sessions. Call touch() on every script run
+    with the session's SessionState (see current_session());
+    a background thread then periodically offloads finished interviews idle
+    for `offload_sec` and, while total usage is over `budget_bytes`, evicts
+    the longest-idle sessions idle for at least `idle_sec`. Either way the
+    session keeps its id and current answer draft, and is flagged
+    "offloaded" so its next run reloads it from the store.
+    """
+
+    def __init__(self, budget_bytes=SESSION_MEMORY_BUDGET_BYTES, idle_sec=SESSION_IDLE_SEC,
+                 offload_sec=SESSION_OFFLOAD_SEC, can_reload=lambda: True):
+        self.budget_bytes = budget_bytes
+        self.idle_sec = idle_sec
+        self.offload_sec = offload_sec
+        self.can_reload = can_reload
+        self._lock = threading.Lock()
+        self._sessions = {}  # session_id -> (state, last active, runtime session id)
+        self._thread = None
+        self.stats = {"offloaded": 0, "evicted": 0}
+
+    def touch(self, session_id, runtime_id, state):
+        if state is None:
+            return
+        with self._lock:
+            # A strong reference: SessionState can't be weakly referenced, and the
+            # per-run wrapper around it is dropped as soon as the run ends
+            self._sessions[session_id] = (state, time.monotonic(), runtime_id)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="session-memory", daemon=True)
+                self._thread.start()
+
+    def _live(self):
+        """[(session_id, state, idle_sec)], dropping sessions Streamlit has closed."""
+        now = time.monotonic()
+        live = []
+        with self._lock:
+            for session_id, (state, last_active, runtime_id) in list(self._sessions.items()):
+                if session_connected(runtime_id):
+                    live.append((session_id, state, now - last_active))
+                else:
+                    del self._sessions[session_id]
+        return live
+
+    @staticmethod
+    def _get(state, key, default=None):
+        try:
+            return state[key]
+        except KeyError:
+            return default
+
+    def _release(self, state):
+        """Drop everything that can be reloaded; background work for it is cancelled."""
+        for key in RELOADABLE_KEYS:
+            if key in state:
+                state[key] = [] if key == "history" else None
+        prefetcher = self._get(state, "prefetcher")
+        if prefetcher is not None:
+            prefetcher.retain(())
+        scorer = self._get(state, "scorer")
+        if scorer is not None:
+            scorer.reset()
+        purge_widget_keys(state, self._get(state, "question_number"))
+        state["offloaded"] = True
+
+    def report(self):
+        """Bytes per live session, largest first, for the debug panel."""
+        rows = []
+        for session_id, state, idle in self._live():
+            values = state.filtered_state
+            rows.append({
+                "session": session_id[:8],
+                "status": values.get("status"),
+                "turns": len(values.get("history") or ()),
+                "offloaded": bool(values.get("offloaded")),
+                "bytes": deep_sizeof(values),
+                "idle_sec": round(idle),
+            })
+        rows.sort(key=lambda row: row["bytes"], reverse=True)
+        return rows
+
+    def enforce(self):
+        if not self.can_reload():
+            return  # nothing to reload from, so nothing may be dropped
+        live = self._live()
+
+        for session_id, state, idle in live:
+            if idle >= self.offload_sec and not self._get(state, "offloaded") \
+                    and self._get(state, "status") == "finished":
+                self._release(state)
+                self.stats["offloaded"] += 1
+
+        sizes = {session_id: deep_sizeof(state.filtered_state) for session_id, state, _ in live}
+        total = sum(sizes.values())
+        for session_id, state, idle in sorted(live, key=lambda entry: -entry[2]):
+            if total <= self.budget_bytes or idle < self.idle_sec:
+                break
+            if self._get(state, "offloaded"):
+                continue
+            self._release(state)
+            self.stats["evicted"] += 1
+            released = deep_sizeof(state.filtered_state)
+            total -= sizes[session_id] - released
+            print(f"[memory.py] Evicted idle session {session_id[:8]} ({sizes[session_id] - released} bytes)")
+
+        registry.set_gauge("interview_session_memory_bytes", {}, total, "Approximate memory held by live sessions.")
+        registry.set_gauge("interview_sessions_live", {}, len(live), "Sessions with state in this process.")
+
+    def _loop(self):
+        while True:
+            time.sleep(ENFORCE_INTERVAL_SEC)
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"[memory.py] Memory check failed: {e!r}")
+
+
+manager = SessionMemoryManager(can_reload=lambda: store.enabled)
@@ -0,0 +1,286 @@
+# metrics.py
+# Per-call instrumentation for model calls: latency, prompt size, token
+# usage, cache status and error class, aggregated into counters and
+# histograms and exported in Prometheus text format.
+#
+# METRICS_PORT=9464  serves /metrics over HTTP from the app process
+# METRICS_FILE=path  rewrites a .prom file (e.g. for node_exporter's textfile collector)
+import os
+import json
+import time
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+TOKENS_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+METRICS_FILE_INTERVAL_SEC = 5.0
+
+# Calls abandoned by the caller (a stream closed early, a cancelled job or
+# task) are recorded with outcome="cancelled", not as model errors
+CANCELLED = (GeneratorExit, asyncio.CancelledError, concurrent.futures.CancelledError)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms keyed by metric name and labels."""
+
+    def __init__(self, recent_size=500):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> float
+        self._gauges = {}      # (name, labels) -> float
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._help = {}
+        self._recent = {}      # site -> deque of recent call records, for the debug panel
+        self.recent_size = recent_size
+        self._last_file_write = 0.0
+
+    def inc(self, name, labels, value=1, help_text=""):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, labels, value, help_text=""):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._help.setdefault(name, ("gauge", help_text))
+            self._gauges[key] = value
+
+    def observe(self, name, labels, value, buckets, help_text=""):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help_text))
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def record_call(self, site, model, cache, latency, prompt_bytes,
+                    prompt_tokens=None, output_tokens=None, error=None, first_chunk=None, cancelled=False):
+        outcome = "cancelled" if cancelled else "error" if error else "ok"
+        self.inc("interview_llm_calls_total", {"site": site, "model": model, "cache": cache, "outcome": outcome},
+                 help_text="Model calls by call site, model, cache status and outcome.")
+        if error:
+            self.inc("interview_llm_errors_total", {"site": site, "model": model, "error": error},
+                     help_text="Failed model calls by error class.")
+
+        self.observe("interview_llm_latency_seconds", {"site": site, "model": model, "cache": cache}, latency,
+                     LATENCY_BUCKETS, "Wall-clock time per model call, including cache lookups.")
+        self.observe("interview_llm_prompt_bytes", {"site": site}, prompt_bytes,
+                     BYTES_BUCKETS, "Size of the prompt sent (or looked up) per call.")
+        if first_chunk is not None:
+            self.observe("interview_llm_first_chunk_seconds", {"site": site, "model": model}, first_chunk,
+                         LATENCY_BUCKETS, "Time to the first streamed chunk.")
+        if prompt_tokens:
+            self.inc("interview_llm_prompt_tokens_total", {"site": site, "model": model}, prompt_tokens,
+                     "Prompt tokens reported by usage_metadata.")
+        if output_tokens:
+            self.inc("interview_llm_output_tokens_total", {"site": site, "model": model}, output_tokens,
+                     "Output tokens reported by usage_metadata.")
+
+        with self._lock:
+            recent = self._recent.setdefault(site, deque(maxlen=self.recent_size))
+            recent.append({
+                "latency": latency, "cache": cache, "error": error,
+                "prompt_bytes": prompt_bytes, "prompt_tokens": prompt_tokens, "output_tokens": output_tokens,
+            })
+
+        _maybe_write_file()
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind in ("counter", "gauge"):
+                    values = self._counters if kind == "counter" else self._gauges
+                    for (n, labels), value in sorted(values.items()):
+                        if n == name:
+                            lines.append(f"{name}{_format_labels(labels)} {value}")
+                else:
+                    for (n, labels), hist in sorted(self._histograms.items(), key=lambda kv: kv[0]):
+                        if n != name:
+                            continue
+                        cumulative = 0
+                        for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                        lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One row per call site over the recent calls, for the debug panel."""
+        rows = []
+        with self._lock:
+            recent = {site: list(calls) for site, calls in self._recent.items()}
+        for site, calls in sorted(recent.items()):
+            latencies = sorted(c["latency"] for c in calls)
+            hits = sum(c["cache"] == "hit" for c in calls)
+            rows.append({
+                "site": site,
+                "calls": len(calls),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000),
+                "cache_hit_rate": round(hits / len(calls), 2),
+                "errors": sum(bool(c["error"]) for c in calls),
+                "avg_prompt_bytes": round(sum(c["prompt_bytes"] for c in calls) / len(calls)),
+                "output_tokens": sum(c["output_tokens"] or 0 for c in calls),
+            })
+        return rows
+
+
+registry = MetricsRegistry()
+
+
+def prompt_bytes(contents, system_instruction=None):
+    if not isinstance(contents, str):
+        contents = json.dumps(contents)
+    return len(contents.encode("utf-8")) + len((system_instruction or "").encode("utf-8"))
+
+
+class CallTracker:
+    """
+    Context manager around one model call. Set .cache and .response (or
+    .usage) inside the block; the call is recorded on exit, including the
+    error class if the block raised, or as cancelled (see CANCELLED).
+    """
+
+    def __init__(self, site, model, contents, system_instruction=None, registry=registry):
+        self.site = site
+        self.model = model
+        self.registry = registry
+        self.prompt_bytes = prompt_bytes(contents, system_instruction)
+        self.cache = "off"
+        self.usage = None
+        self._first_chunk = None
+
+    def first_chunk(self):
+        if self._first_chunk is None:
+            self._first_chunk = time.perf_counter() - self._start
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        usage = self.usage
+        cancelled = exc_type is not None and issubclass(exc_type, CANCELLED)
+        self.registry.record_call(
+            self.site,
+            self.model,
+            self.cache,
+            time.perf_counter() - self._start,
+            self.prompt_bytes,
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            output_tokens=getattr(usage, "candidates_token_count", None),
+            error=exc_type.__name__ if exc_type and not cancelled else None,
+            first_chunk=self._first_chunk,
+            cancelled=cancelled,
+        )
+        return False
+
+
+# ---- Exporters ----
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def write_prometheus_file(path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _maybe_write_file():
+    path = os.getenv("METRICS_FILE")
+    if not path:
+        return
+    now = time.time()
+    with registry._lock:
+        if now - registry._last_file_write < METRICS_FILE_INTERVAL_SEC:
+            return
+        registry._last_file_write = now
+    try:
+        write_prometheus_file(path)
+    except OSError as e:
+        print(f"[metrics.py] Could not write {path}: {e!r}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """Serve /metrics from a daemon thread. Returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_exporters_from_env():
+    """Start the HTTP exporter if METRICS_PORT is set. Safe to call on every script run."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        port = os.getenv("METRICS_PORT")
+        if port:
+            try:
+                serve_metrics(int(port))
+            except OSError as e:
+                print(f"[metrics.py] Could not serve metrics on port {port}: {e!r}")
@@ -0,0 +1,82 @@
+# openers.py
+# Precomputed opening questions, so "Start Interview" doesn't need an LLM call.
+#
+# Build the pack (needs GEMINI_API_KEY):
+#     python openers.py --per-combo 12
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+ROLES = ["Software Engineer", "Data Analyst", "Sales Associate", "Product Manager"]
+INTERVIEW_TYPES = ["Technical", "Behavioral", "Mixed"]
+
+OPENER_PACK_PATH = os.getenv(
+    "OPENER_PACK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "openers.json"),
+)
+
+_bank = None
+
+
+def _combo_key(role, interview_type):
+    return f"{role}|{interview_type}"
+
+
+def load_opener_bank(path=OPENER_PACK_PATH):
+    """Load the pack once per process. A missing or broken pack is an empty bank."""
+    global _bank
+    if _bank is None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _bank = json.load(f).get("openers", {})
+        except (OSError, ValueError):
+            _bank = {}
+    return _bank
+
+
+def sample_opener(role, interview_type, rng=random):
+    """Return a random precomputed opener for this combination, or None if there isn't one."""
+    pool = load_opener_bank().get(_combo_key(role, interview_type))
+    return rng.choice(pool) if pool else None
+
+
+def build_bank(per_combo=10, roles=ROLES, interview_types=INTERVIEW_TYPES):
+    """Ask the model for `per_combo` openers for every role/type combination."""
+    # Imported here so loading the pack never pulls in the model client
+    from agent import generate_openers
+
+    openers = {}
+    for role in roles:
+        for interview_type in interview_types:
+            questions = generate_openers(role, interview_type, per_combo)
+            openers[_combo_key(role, interview_type)] = questions
+            print(f"{role} / {interview_type}: {len(questions)} openers")
+    return openers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the opening-question pack.")
+    parser.add_argument("--per-combo", type=int, default=10, help="openers per role/type combination")
+    parser.add_argument("--out", default=OPENER_PACK_PATH, help="output pack file")
+    args = parser.parse_args(argv)
+
+    from agent import get_model_name
+
+    pack = {
+        "version": 1,
+        "model": get_model_name(),
+        "built_at": int(time.time()),
+        "openers": build_bank(args.per_combo),
+    }
+    tmp_path = args.out + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pack, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, args.out)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# prefetch.py
+# Speculatively computes the next interview question in the background
+# while the candidate is still answering the current one.
+import json
+import hashlib
+import weakref
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from agent import get_next_question
+from ratelimit import set_speculative
+
+
+def question_key(role, interview_type, history, question_number, max_questions):
+    """
+    Fingerprint of everything that determines the next question.
+    Only question/answer text is hashed: timing stats change between the
+    draft and the real submit, but shouldn't invalidate the prefetched question.
+    """
+    payload = {
+        "role": role,
+        "interview_type": interview_type,
+        "qa": [[item.get("question", ""), item.get("answer", "")] for item in history],
+        "question_number": question_number,
+        "max_questions": max_questions,
+    }
+    raw = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class QuestionPrefetcher:
+    """
+    Per-session pool of speculative get_next_question calls, keyed by
+    question_key(). Keep one instance in st.session_state.
+    """
+
+    def __init__(self, max_workers=2, fetch=get_next_question):
+        self._fetch = fetch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}
+        self._timers = {}  # key -> Timer of a delayed prefetch that hasn't started yet
+        self._lock = threading.Lock()
+        # Don't leave idle threads behind when the session is dropped
+        weakref.finalize(self, self._executor.shutdown, wait=False)
+
+    def prefetch(self, role, interview_type, history, question_number, max_questions, delay=0):
+        """
+        Start computing the next question for this state, unless already started. Returns the key.
+        delay: start only if the key is still retained this many seconds from
+        now, so rapidly changing drafts don't each start a call. A later
+        prefetch of the same key with a shorter delay starts it right away.
+        """
+        key = question_key(role, interview_type, history, question_number, max_questions)
+        with self._lock:
+            if key in self._futures or (delay > 0 and key in self._timers):
+                return key
+            # Copy so later mutations of session_state history don't leak into the worker
+            snapshot = [dict(item) for item in history]
+            # Run in a copy of the caller's context so calls stay attributed to its session
+            call = (contextvars.copy_context(), (role, interview_type, snapshot, question_number, max_questions))
+            if delay > 0:
+                timer = threading.Timer(delay, self._start_scheduled, (key, *call))
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+                return key
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            self._start(key, *call)
+        return key
+
+    def _start(self, key, context, args):
+        # Rate limiting serves calls someone is waiting for first
+        context.run(set_speculative)
+        self._futures[key] = self._executor.submit(context.run, self._fetch, *args)
+
+    def _start_scheduled(self, key, context, args):
+        with self._lock:
+            if self._timers.pop(key, None) is None:
+                return  # retained no longer, or already started
+            self._start(key, context, args)
+
+    def retain(self, keys):
+        """Cancel and forget every prefetch (started or delayed) whose key is not in `keys`."""
+        with self._lock:
+            for key in list(self._timers):
+                if key not in keys:
+                    self._timers.pop(key).cancel()
+            for key in list(self._futures):
+                if key not in keys:
+                    # Calls already running can't be interrupted; their result is just dropped.
+                    self._futures.pop(key).cancel()
+
+    def take(self, role, interview_type, history, question_number, max_questions, timeout=None):
+        """
+        Return the prefetched question for this state, waiting up to `timeout`
+        seconds if it is still in flight. Returns None on a miss or failure.
+        Everything else is invalidated, since the caller is moving on.
+        """
+        key = question_key(role, interview_type, history, question_number, max_questions)
+        with self._lock:
+            future = self._futures.pop(key, None)
+        self.retain(())
+
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except CancelledError:
+            return None
+        except Exception as e:
+            print(f"[prefetch.py] Prefetch failed, falling back: {e!r}")
+            return None
+
+    def shutdown(self):
+        self.retain(())
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,316 @@
+# ratelimit.py
+# Client-side rate limiting for model calls: token buckets for requests and
+# tokens per minute, shared by every session in the process (and optionally
+# by every process on the host through a SQLite file), so bursts queue here
+# instead of coming back as quota errors.
+#
+# Waiters are served by priority (interactive question calls before feedback
+# work, speculative prefetches last), then round-robin across sessions, then
+# in arrival order.
+import os
+import time
+import asyncio
+import sqlite3
+import itertools
+import threading
+import contextvars
+
+from metrics import registry
+
+# Lower rank is served first; unknown tasks go last
+PRIORITIES = {"question": 0, "feedback": 1, "prefetch": 2}
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Upper bound on one sleep, so waiters notice capacity freed by other processes
+MAX_POLL_SEC = 1.0
+
+_session = contextvars.ContextVar("ratelimit_session", default="anonymous")
+_speculative = contextvars.ContextVar("ratelimit_speculative", default=False)
+
+
+def set_session(session_id):
+    """Attribute calls made from this context (and contexts copied from it) to session_id."""
+    _session.set(str(session_id))
+
+
+def current_session():
+    return _session.get()
+
+
+def set_speculative():
+    """Mark calls made from this context as speculative: nobody is waiting on them yet."""
+    _speculative.set(True)
+
+
+def is_speculative():
+    return _speculative.get()
+
+
+class RateLimitTimeout(TimeoutError):
+    """No capacity freed up before the caller's deadline."""
+
+
+def _apply(levels, limits, need, elapsed):
+    """
+    Refill both buckets for `elapsed` seconds and try to take `need` from them.
+    A limit of 0 means unlimited. Returns (new_levels, wait): wait is 0 if the
+    take succeeded, else seconds until it could.
+    """
+    refilled = []
+    wait = 0.0
+    for level, limit, amount in zip(levels, limits, need):
+        if limit:
+            level = min(float(limit), level + elapsed * limit / 60.0)
+            # Requests bigger than the bucket wait for a full one instead of forever
+            amount = min(amount, limit)
+            if level < amount:
+                wait = max(wait, (amount - level) * 60.0 / limit)
+        refilled.append(level)
+
+    if wait:
+        return refilled, wait
+    return [level - amount if limit else level
+            for level, limit, amount in zip(refilled, limits, need)], 0.0
+
+
+class _LocalBuckets:
+    """Request and token buckets in process memory."""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self._levels = [float(limit) for limit in limits]
+        self._updated = time.monotonic()
+
+    def take(self, need):
+        now = time.monotonic()
+        self._levels, wait = _apply(self._levels, self.limits, need, now - self._updated)
+        self._updated = now
+        return wait
+
+    def adjust(self, tokens):
+        """Charge (or refund, if negative) tokens after the fact; the level may go below 0."""
+        self.take((0, 0))
+        if self.limits[1]:
+            self._levels[1] = min(float(self.limits[1]), self._levels[1] - tokens)
+
+
+class _SharedBuckets:
+    """Same buckets kept in a SQLite row, updated under an exclusive transaction."""
+
+    def __init__(self, path, name, limits):
+        self.limits = limits
+        self.name = name
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            " name TEXT PRIMARY KEY, requests REAL NOT NULL,"
+            " tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _update(self, fn):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._db.execute(
+                    "SELECT requests, tokens, updated FROM rate_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None:
+                    levels, elapsed = [float(limit) for limit in self.limits], 0.0
+                else:
+                    levels, elapsed = [row[0], row[1]], max(0.0, now - row[2])
+                levels, result = fn(levels, elapsed)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (name, requests, tokens, updated) VALUES (?, ?, ?, ?)",
+                    (self.name, levels[0], levels[1], now),
+                )
+                self._db.execute("COMMIT")
+                return result
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def take(self, need):
+        try:
+            return self._update(lambda levels, elapsed: _apply(levels, self.limits, need, elapsed))
+        except sqlite3.Error as e:
+            # Fail open: the provider's own quota errors are still retried upstream
+            print(f"[ratelimit.py] Shared bucket unavailable, not limiting: {e!r}")
+            return 0.0
+
+    def adjust(self, tokens):
+        def charge(levels, elapsed):
+            levels, _ = _apply(levels, self.limits, (0, 0), elapsed)
+            if self.limits[1]:
+                levels[1] = min(float(self.limits[1]), levels[1] - tokens)
+            return levels, None
+
+        try:
+            self._update(charge)
+        except sqlite3.Error as e:
+            print(f"[ratelimit.py] Shared bucket unavailable, usage not recorded: {e!r}")
+
+
+class _Waiter:
+    __slots__ = ("task", "rank", "session", "seq", "tokens")
+
+    def __init__(self, task, session, seq, tokens):
+        self.task = task
+        self.rank = PRIORITIES.get(task, len(PRIORITIES))
+        self.session = session
+        self.seq = seq
+        self.tokens = tokens
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one quota (e.g. one
+    model). Call acquire() before each request with its estimated tokens and
+    settle() once the real usage is known. Safe to share across threads.
+    db_path shares the buckets with other processes using the same file.
+    """
+
+    def __init__(self, name, rpm=0, tpm=0, db_path=None):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self._buckets = self._open_buckets((rpm, tpm), db_path)
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._last_served = {}  # session -> monotonic time of its last grant
+        self._seq = itertools.count()
+        self.stats = {"granted": 0, "timeouts": 0, "waited_sec": 0.0}
+
+    def _open_buckets(self, limits, db_path):
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                return _SharedBuckets(db_path, self.name, limits)
+            except (OSError, sqlite3.Error) as e:
+                print(f"[ratelimit.py] Shared buckets unavailable, limiting this process only: {e!r}")
+        return _LocalBuckets(limits)
+
+    # ---- Queue ----
+
+    def _head(self):
+        return min(self._waiting, key=lambda w: (w.rank, self._last_served.get(w.session, 0.0), w.seq))
+
+    def _report_depth(self):
+        for task in set(PRIORITIES) | {w.task for w in self._waiting}:
+            registry.set_gauge(
+                "interview_ratelimit_queue_depth", {"limiter": self.name, "task": task},
+                sum(w.task == task for w in self._waiting),
+                "Calls waiting for rate-limit capacity.",
+            )
+
+    def _enqueue(self, task, session, tokens):
+        waiter = _Waiter(task, session or current_session(), next(self._seq), tokens)
+        with self._cond:
+            self._waiting.append(waiter)
+            self._report_depth()
+        return waiter
+
+    def _dequeue(self, waiter):
+        with self._cond:
+            self._waiting.remove(waiter)
+            self._report_depth()
+            self._cond.notify_all()
+
+    def _try_grant(self, waiter):
+        """Called with the lock held. Returns 0 if granted, else how long to sleep."""
+        if self._head() is not waiter:
+            return MAX_POLL_SEC
+        wait = self._buckets.take((1, waiter.tokens))
+        if wait:
+            return min(wait, MAX_POLL_SEC)
+
+        now = time.monotonic()
+        self._last_served[waiter.session] = now
+        if len(self._last_served) > 1024:
+            self._last_served = {s: t for s, t in self._last_served.items() if now - t < 60}
+        return 0.0
+
+    def _granted(self, waiter, waited):
+        self.stats["granted"] += 1
+        self.stats["waited_sec"] += waited
+        registry.observe("interview_ratelimit_wait_seconds", {"limiter": self.name, "task": waiter.task}, waited,
+                         WAIT_BUCKETS, "Time spent queued for rate-limit capacity.")
+        return waited
+
+    def _timed_out(self, waiter, waited):
+        self.stats["timeouts"] += 1
+        registry.inc("interview_ratelimit_timeouts_total", {"limiter": self.name, "task": waiter.task},
+                     help_text="Calls that gave up waiting for rate-limit capacity.")
+        return RateLimitTimeout(f"{self.name}: no capacity within {waited:.1f}s")
+
+    # ---- API ----
+
+    def acquire(self, tokens, task="question", session=None, timeout=None):
+        """
+        Block until one request and `tokens` tokens are available.
+        Returns the seconds spent waiting; raises RateLimitTimeout after `timeout`.
+        """
+        start = time.monotonic()
+        waiter = self._enqueue(task, session, tokens)
+        try:
+            with self._cond:
+                while True:
+                    sleep = self._try_grant(waiter)
+                    waited = time.monotonic() - start
+                    if not sleep:
+                        return self._granted(waiter, waited)
+                    if timeout is not None:
+                        if waited >= timeout:
+                            raise self._timed_out(waiter, waited)
+                        sleep = min(sleep, timeout - waited)
+                    self._cond.wait(sleep)
+        finally:
+            self._dequeue(waiter)
+
+    async def acquire_async(self, tokens, task="question", session=None, timeout=None):
+        """Async version of acquire(); polls instead of blocking the event loop."""
+        start = time.monotonic()
+        waiter = self._enqueue(task, session, tokens)
+        try:
+            while True:
+                with self._cond:
+                    sleep = self._try_grant(waiter)
+                    waited = time.monotonic() - start
+                    if not sleep:
+                        return self._granted(waiter, waited)
+                    if timeout is not None:
+                        if waited >= timeout:
+                            raise self._timed_out(waiter, waited)
+                        sleep = min(sleep, timeout - waited)
+                # Async waiters aren't woken by notify(), so re-check often
+                await asyncio.sleep(min(sleep, 0.05))
+        finally:
+            self._dequeue(waiter)
+
+    def settle(self, reserved, used):
+        """Correct the token bucket once a call's real usage is known."""
+        if self.tpm and used is not None:
+            with self._cond:
+                self._buckets.adjust(used - reserved)
+
+    def snapshot(self):
+        """One row for the debug panel."""
+        with self._cond:
+            waiting = len(self._waiting)
+            by_task = {}
+            for waiter in self._waiting:
+                by_task[waiter.task] = by_task.get(waiter.task, 0) + 1
+        granted = self.stats["granted"]
+        return {
+            "limiter": self.name,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "waiting": waiting,
+            "waiting_by_task": by_task,
+            "granted": granted,
+            "timeouts": self.stats["timeouts"],
+            "avg_wait_ms": round(self.stats["waited_sec"] / granted * 1000) if granted else 0,
+        }
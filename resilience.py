@@ -0,0 +1,255 @@
+# resilience.py
+# Resilient call layer for model requests: per-call deadlines, jittered
+# retries on transient errors, optional hedged duplicate requests, and a
+# per-model circuit breaker that fails over to the next model in line.
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from metrics import registry
+
+# Matched by class name so google.api_core doesn't need importing here
+TRANSIENT_ERROR_NAMES = {
+    "TimeoutError",
+    "ConnectionError",
+    "ConnectionResetError",
+    "DeadlineExceeded",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "TooManyRequests",
+    "InternalServerError",
+    "GatewayTimeout",
+    "Aborted",
+    "RetryError",
+    "URLError",
+}
+
+# Errors meaning "this model can't serve us at all": fail over immediately
+MODEL_UNAVAILABLE_ERROR_NAMES = {"NotFound", "PermissionDenied"}
+
+
+def is_transient(exc):
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+def is_model_unavailable(exc):
+    return type(exc).__name__ in MODEL_UNAVAILABLE_ERROR_NAMES
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call runs out of its overall deadline."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `cooldown_sec`, letting one trial call through;
+    half-open -> closed on success, back to open on failure.
+    """
+
+    def __init__(self, name, failure_threshold=5, cooldown_sec=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown_sec:
+                self.state = "half_open"
+                return True
+            # In half-open only the single trial call is in flight
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self.state != "closed":
+                self.state = "closed"
+                registry.inc("interview_llm_breaker_transitions_total", {"model": self.name, "to": "closed"},
+                             help_text="Circuit breaker state changes per model.")
+
+    def record_failure(self, trip=False):
+        with self._lock:
+            self._failures += 1
+            if trip or self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    registry.inc("interview_llm_breaker_transitions_total", {"model": self.name, "to": "open"},
+                                 help_text="Circuit breaker state changes per model.")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+    Runs `attempt(model_name, timeout_sec)` with retries, hedging and failover.
+    `models` is the failover order; the first model whose breaker allows a
+    call is used for each attempt. One instance is shared per process.
+    """
+
+    def __init__(self, max_attempts=3, backoff_base_sec=0.5, backoff_cap_sec=8.0,
+                 hedge=False, hedge_min_delay_sec=1.0, hedge_min_samples=20,
+                 failure_threshold=5, cooldown_sec=30.0, max_workers=16):
+        self.max_attempts = max_attempts
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_cap_sec = backoff_cap_sec
+        self.hedge = hedge
+        self.hedge_min_delay_sec = hedge_min_delay_sec
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+
+        self._breakers = {}
+        self._latencies = {}  # site -> recent successful latencies
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def breaker(self, model_name):
+        with self._lock:
+            breaker = self._breakers.get(model_name)
+            if breaker is None:
+                breaker = self._breakers[model_name] = CircuitBreaker(
+                    model_name, self.failure_threshold, self.cooldown_sec
+                )
+            return breaker
+
+    def _pick_model(self, site, models, last_model):
+        chosen = None
+        for name in models:
+            if self.breaker(name).allow():
+                chosen = name
+                break
+        # Everything is open: try the primary anyway rather than failing outright
+        chosen = chosen or models[0]
+
+        if last_model is not None and chosen != last_model:
+            registry.inc("interview_llm_failovers_total", {"site": site, "from": last_model, "to": chosen},
+                         help_text="Switches to a fallback model after failures.")
+        return chosen
+
+    def hedge_delay(self, site):
+        """p95 of recent successful latency for `site`, or None until there's enough data."""
+        with self._lock:
+            samples = sorted(self._latencies.get(site, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay_sec, samples[int(len(samples) * 0.95) - 1])
+
+    def _record_latency(self, site, seconds):
+        with self._lock:
+            self._latencies.setdefault(site, deque(maxlen=200)).append(seconds)
+
+    def _backoff(self, attempt):
+        # Full jitter
+        return random.uniform(0, min(self.backoff_cap_sec, self.backoff_base_sec * 2 ** attempt))
+
+    def _on_error(self, site, model_name, exc):
+        unavailable = is_model_unavailable(exc)
+        self.breaker(model_name).record_failure(trip=unavailable)
+        registry.inc("interview_llm_attempt_failures_total",
+                     {"site": site, "model": model_name, "error": type(exc).__name__},
+                     help_text="Failed attempts inside the resilient call layer.")
+        return unavailable or is_transient(exc)
+
+    def call(self, site, models, attempt, deadline_sec, hedge=None):
+        """
+        Blocking call. Returns (result, model_name_used).
+        Non-transient errors are raised immediately; transient ones are
+        retried until max_attempts or the deadline runs out.
+        """
+        hedge = self.hedge if hedge is None else hedge
+        end = time.monotonic() + deadline_sec
+        last_model = None
+
+        for n in range(self.max_attempts):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            model_name = last_model = self._pick_model(site, models, last_model)
+
+            start = time.monotonic()
+            try:
+                if hedge:
+                    result = self._hedged(site, model_name, attempt, remaining)
+                else:
+                    result = attempt(model_name, remaining)
+            except Exception as exc:
+                if not self._on_error(site, model_name, exc) or n == self.max_attempts - 1:
+                    raise
+                registry.inc("interview_llm_retries_total", {"site": site, "error": type(exc).__name__},
+                             help_text="Retries after transient errors.")
+                time.sleep(min(self._backoff(n), max(0.0, end - time.monotonic())))
+                continue
+
+            self.breaker(model_name).record_success()
+            self._record_latency(site, time.monotonic() - start)
+            return result, model_name
+
+        raise DeadlineExceeded(f"{site}: no successful response within {deadline_sec}s")
+
+    def _hedged(self, site, model_name, attempt, remaining):
+        """Run the attempt; if it's slower than the site's p95, race a duplicate and keep the first success."""
+        delay = self.hedge_delay(site)
+        primary = self._executor.submit(attempt, model_name, remaining)
+        if delay is None or delay >= remaining:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        registry.inc("interview_llm_hedges_total", {"site": site}, help_text="Hedged duplicate requests sent.")
+        hedge = self._executor.submit(attempt, model_name, remaining - delay)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, remaining - delay), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    # The other request can't be interrupted; its result is dropped.
+                    registry.inc("interview_llm_hedge_wins_total",
+                                 {"site": site, "winner": "hedge" if future is hedge else "primary"},
+                                 help_text="Which request answered first when hedging.")
+                    return future.result()
+                error = future.exception()
+        raise error or DeadlineExceeded(f"{site}: hedged request timed out")
+
+    async def call_async(self, site, models, attempt, deadline_sec):
+        """
+        Async counterpart of call() without hedging; `attempt` is a coroutine
+        function. Cancelling the caller cancels the in-flight attempt.
+        """
+        end = time.monotonic() + deadline_sec
+        last_model = None
+
+        for n in range(self.max_attempts):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            model_name = last_model = self._pick_model(site, models, last_model)
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(attempt(model_name, remaining), timeout=remaining)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if not self._on_error(site, model_name, exc) or n == self.max_attempts - 1:
+                    raise
+                registry.inc("interview_llm_retries_total", {"site": site, "error": type(exc).__name__},
+                             help_text="Retries after transient errors.")
+                await asyncio.sleep(min(self._backoff(n), max(0.0, end - time.monotonic())))
+                continue
+
+            self.breaker(model_name).record_success()
+            self._record_latency(site, time.monotonic() - start)
+            return result, model_name
+
+        raise DeadlineExceeded(f"{site}: no successful response within {deadline_sec}s")
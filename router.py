@@ -0,0 +1,142 @@
+# router.py
+# Latency-aware model routing: keeps rolling latency / error statistics per
+# model and task type, and orders the candidate models for each call so the
+# fastest healthy model that meets the task's quality floor goes first.
+import time
+import threading
+from contextlib import contextmanager
+
+from metrics import registry
+
+# Rough capability tiers by model family; unknown models get tier 1.
+QUALITY_TIERS = [
+    ("-pro", 3),
+    ("-flash", 2),
+]
+
+# Per task: minimum quality tier and the latency budget a model must stay within
+DEFAULT_TASKS = {
+    "question": {"quality_floor": 1, "latency_budget_sec": 4.0},
+    "feedback": {"quality_floor": 2, "latency_budget_sec": 25.0},
+}
+
+
+def model_quality(model_name):
+    if "1.0" in model_name:
+        return 1
+    for marker, tier in QUALITY_TIERS:
+        if marker in model_name:
+            return tier
+    return 1
+
+
+class ModelStats:
+    def __init__(self):
+        self.latency = None  # EWMA seconds of successful calls
+        self.error_rate = 0.0  # EWMA of failures
+        self.samples = 0
+
+
+class ModelRouter:
+    """
+    route(task, candidates) returns the candidates re-ordered for this call:
+    - a demoted or never-tried model that meets the quality floor goes first
+      as a probe (at most one per task per `reprobe_interval_sec`),
+    - then healthy models fastest first,
+    - then demoted models, as last-resort fallbacks.
+    A model is demoted when its EWMA latency is over the task budget or its
+    EWMA error rate is over `error_threshold`.
+    """
+
+    def __init__(self, tasks=None, alpha=0.2, error_threshold=0.3, reprobe_interval_sec=300.0, min_samples=3):
+        self.tasks = dict(tasks or DEFAULT_TASKS)
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.reprobe_interval_sec = reprobe_interval_sec
+        self.min_samples = min_samples
+        self._stats = {}  # (task, model) -> ModelStats
+        self._last_probe = {}  # task -> monotonic time of its last probe
+        self._lock = threading.Lock()
+
+    def _get(self, task, model):
+        stats = self._stats.get((task, model))
+        if stats is None:
+            stats = self._stats[(task, model)] = ModelStats()
+        return stats
+
+    def _demoted(self, task, stats):
+        if stats.samples < self.min_samples:
+            return False
+        budget = self.tasks.get(task, {}).get("latency_budget_sec")
+        too_slow = budget is not None and stats.latency is not None and stats.latency > budget
+        return too_slow or stats.error_rate > self.error_threshold
+
+    def route(self, task, candidates):
+        config = self.tasks.get(task, {})
+        floor = config.get("quality_floor", 1)
+        eligible = [m for m in candidates if model_quality(m) >= floor]
+        below_floor = [m for m in candidates if m not in eligible]
+        # Models under the floor are only ever fallbacks, never probed
+        can_probe = bool(eligible)
+        if not eligible:
+            eligible, below_floor = list(candidates), []
+
+        now = time.monotonic()
+        with self._lock:
+            probe_due = can_probe and now - self._last_probe.get(task, float("-inf")) >= self.reprobe_interval_sec
+            healthy, demoted, probe = [], [], None
+            for model in eligible:
+                stats = self._get(task, model)
+                untried = stats.samples == 0
+                if probe_due and probe is None and (untried or self._demoted(task, stats)):
+                    self._last_probe[task] = now
+                    probe = model
+                elif untried or not self._demoted(task, stats):
+                    healthy.append(model)
+                else:
+                    demoted.append(model)
+
+            # Untried models keep their preference order, after the measured ones
+            healthy.sort(key=lambda m: (self._get(task, m).latency is None, self._get(task, m).latency or 0.0))
+            demoted.sort(key=lambda m: self._get(task, m).latency or float("inf"))
+
+        ordered = ([probe] if probe else []) + healthy + demoted + below_floor
+        if probe:
+            registry.inc("interview_llm_router_probes_total", {"task": task, "model": probe},
+                         help_text="Calls routed to a demoted or untried model to refresh its stats.")
+        registry.inc("interview_llm_router_choices_total", {"task": task, "model": ordered[0]},
+                     help_text="First-choice model picked by the router per task.")
+        return ordered
+
+    def record(self, task, model, latency, ok):
+        with self._lock:
+            stats = self._get(task, model)
+            stats.samples += 1
+            stats.error_rate += self.alpha * ((0.0 if ok else 1.0) - stats.error_rate)
+            if ok:
+                stats.latency = latency if stats.latency is None else stats.latency + self.alpha * (latency - stats.latency)
+
+    @contextmanager
+    def observe(self, task, model):
+        """Time the block and record it as a success, or as a failure if it raises."""
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.record(task, model, time.monotonic() - start, ok=False)
+            raise
+        self.record(task, model, time.monotonic() - start, ok=True)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    "task": task,
+                    "model": model,
+                    "latency_sec": None if s.latency is None else round(s.latency, 3),
+                    "error_rate": round(s.error_rate, 3),
+                    "samples": s.samples,
+                    "demoted": self._demoted(task, s),
+                }
+                for (task, model), s in sorted(self._stats.items())
+            ]
@@ -0,0 +1,68 @@
+# scoring.py
+# Scores each answer in the background as soon as it is submitted, so the
+# final feedback only has to aggregate precomputed per-answer results.
+import json
+import hashlib
+import weakref
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from agent import score_answer
+
+
+def _item_key(index, item):
+    raw = json.dumps([index, item.get("question", ""), item.get("answer", "")]).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class AnswerScorer:
+    """
+    Per-session background scorer. Keep one instance in st.session_state and
+    call submit() for every answer appended to history.
+    """
+
+    def __init__(self, max_workers=2, score=score_answer):
+        self._score = score
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scoring")
+        self._futures = {}
+        weakref.finalize(self, self._executor.shutdown, wait=False)
+
+    def submit(self, role, interview_type, index, item):
+        """Start scoring history[index] unless it is already being scored."""
+        key = _item_key(index, item)
+        if key not in self._futures:
+            self._futures[key] = self._executor.submit(
+                contextvars.copy_context().run, self._score, role, interview_type, dict(item)
+            )
+        return key
+
+    def collect(self, history, timeout=None):
+        """
+        Return per-answer results aligned with history, waiting up to `timeout`
+        seconds for scores still in flight. Entries are None for answers that
+        were never submitted, failed, or didn't finish in time.
+        """
+        keys = [_item_key(i, item) for i, item in enumerate(history)]
+        pending = [self._futures[key] for key in keys if key in self._futures]
+        wait(pending, timeout=timeout)
+
+        results = []
+        for key in keys:
+            future = self._futures.get(key)
+            if future is None or not future.done():
+                results.append(None)
+            elif future.cancelled() or future.exception() is not None:
+                if not future.cancelled():
+                    print(f"[scoring.py] Answer scoring failed: {future.exception()!r}")
+                # Forget it so a later submit() retries this answer
+                self._futures.pop(key, None)
+                results.append(None)
+            else:
+                results.append(future.result())
+        return results
+
+    def reset(self):
+        """Drop all scores, e.g. when the interview restarts."""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
@@ -0,0 +1,208 @@
+# sessions.py
+# Durable interview sessions: every turn is appended as an event to a SQLite
+# (WAL) table keyed by session id, and a session is resumed by replaying its
+# events. Writes are queued and committed in batches by one background
+# thread, so recording a turn never waits on disk.
+#
+# Processes that share the database file (same host or shared volume) share
+# sessions, so a refresh or a reconnect to another worker picks up where the
+# candidate left off.
+import os
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+
+SESSION_STORE_PATH = os.getenv(
+    "SESSION_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "interview_partner", "sessions.sqlite3"),
+)
+SESSION_FLUSH_SEC = float(os.getenv("SESSION_FLUSH_MS", 200)) / 1000
+SESSION_RETENTION_DAYS = float(os.getenv("SESSION_RETENTION_DAYS", 30))
+
+EVENT_KINDS = ("start", "question", "answer", "skip", "finish", "feedback", "restart")
+
+
+def replay(events):
+    """
+    Rebuild interview state from (kind, payload, ts) events, oldest first.
+    Returns a dict with role, interview_type, max_questions, chat_mode,
+    status, history, current_question, question_number, question_start_time,
+    submitted_question and feedback (a dict, or None).
+    """
+    state = None
+    for kind, payload, ts in events:
+        if kind == "start":
+            state = {
+                "role": payload["role"],
+                "interview_type": payload["interview_type"],
+                "max_questions": payload["max_questions"],
+                "chat_mode": payload.get("chat_mode", False),
+                "status": "in_progress",
+                "history": [],
+                "current_question": "",
+                "question_number": 0,
+                "question_start_time": None,
+                "submitted_question": 0,
+                "feedback": None,
+            }
+        elif kind == "restart":
+            state = None
+        elif state is None:
+            continue  # events from before a start we don't have
+        elif kind == "question":
+            state["current_question"] = payload["text"]
+            state["question_number"] = payload["number"]
+            state["question_start_time"] = ts
+        elif kind == "answer":
+            state["history"].append(payload["item"])
+            state["submitted_question"] = payload["number"]
+        elif kind == "skip":
+            state["submitted_question"] = payload["number"]
+        elif kind == "finish":
+            state["status"] = "finished"
+            state["current_question"] = ""
+            state["question_start_time"] = None
+        elif kind == "feedback":
+            state["feedback"] = payload
+    return state
+
+
+class SessionStore:
+    """
+    record() appends an event for a session; load() replays one. Safe to share
+    across threads. path=None keeps nothing (record is a no-op, load returns None).
+    """
+
+    def __init__(self, path=SESSION_STORE_PATH, flush_sec=SESSION_FLUSH_SEC,
+                 retention_days=SESSION_RETENTION_DAYS):
+        self.flush_sec = flush_sec
+        self._lock = threading.Lock()
+        self._db = self._open(path) if path else None
+        self._queue = queue.Queue()
+        self._writer = None
+        self.stats = {"events": 0, "batches": 0, "loads": 0}
+        if self._db is not None:
+            self.prune(retention_days * 24 * 60 * 60)
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _open(path):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS session_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,"
+                " ts REAL NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS session_events_by_session ON session_events (session_id, id)")
+            return db
+        except (OSError, sqlite3.Error) as e:
+            print(f"[sessions.py] Session store unavailable, sessions won't survive a restart: {e!r}")
+            return None
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    # ---- Writing ----
+
+    def record(self, session_id, kind, payload=None):
+        """Queue one event; it is committed with the next batch."""
+        if self._db is None:
+            return
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown session event: {kind}")
+        self._queue.put((session_id, time.time(), kind, json.dumps(payload or {})))
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Whatever else arrives within the flush window goes in the same transaction
+            deadline = time.monotonic() + self.flush_sec
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        events = [item for item in batch if not isinstance(item, threading.Event)]
+        if events:
+            try:
+                with self._lock:
+                    self._db.execute("BEGIN")
+                    self._db.executemany(
+                        "INSERT INTO session_events (session_id, ts, kind, payload) VALUES (?, ?, ?, ?)",
+                        events,
+                    )
+                    self._db.execute("COMMIT")
+                self.stats["events"] += len(events)
+                self.stats["batches"] += 1
+            except sqlite3.Error as e:
+                print(f"[sessions.py] Dropped {len(events)} session events: {e!r}")
+                try:
+                    with self._lock:
+                        self._db.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+        # flush() waiters
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def flush(self, timeout=5.0):
+        """Wait until every event recorded so far is committed."""
+        if self._db is None or self._writer is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    # ---- Reading ----
+
+    def load(self, session_id):
+        """Replayed state of a session (see replay()), or None if there is nothing to resume."""
+        if self._db is None:
+            return None
+        self.flush()
+        try:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT kind, payload, ts FROM session_events WHERE session_id = ? ORDER BY id",
+                    (session_id,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"[sessions.py] Couldn't load session {session_id}: {e!r}")
+            return None
+        self.stats["loads"] += 1
+        return replay((kind, json.loads(payload), ts) for kind, payload, ts in rows)
+
+    def prune(self, max_age_sec):
+        """Delete sessions whose last event is older than max_age_sec."""
+        cutoff = time.time() - max_age_sec
+        try:
+            with self._lock:
+                self._db.execute(
+                    "DELETE FROM session_events WHERE session_id IN ("
+                    " SELECT session_id FROM session_events GROUP BY session_id HAVING MAX(ts) < ?)",
+                    (cutoff,),
+                )
+        except sqlite3.Error as e:
+            print(f"[sessions.py] Pruning old sessions failed: {e!r}")
+
+
+store = SessionStore(SESSION_STORE_PATH if os.getenv("SESSION_STORE", "1") != "0" else None)
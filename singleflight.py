@@ -0,0 +1,139 @@
+# singleflight.py
+# Request coalescing for model calls triggered from the UI. A double click or
+# a rerun racing a click re-runs the script while the previous run's call is
+# still in flight; with single-flight the new run attaches to that call
+# instead of starting another, and a repeat after it finished gets the same
+# result back.
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+
+
+def flight_key(session_id, question_number, history_hash):
+    """Key for one question request: same session, same slot, same history."""
+    return (session_id, question_number, history_hash)
+
+
+class _Flight:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.finished_at = None
+
+    def append(self, chunk):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.finished_at = time.monotonic()
+            self.cond.notify_all()
+
+    def follow(self):
+        """Replay chunks produced so far, then wait for the rest."""
+        i = 0
+        while True:
+            with self.cond:
+                while i == len(self.chunks) and not self.done:
+                    self.cond.wait()
+                if i == len(self.chunks):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                pending = self.chunks[i:]
+            i += len(pending)
+            yield from pending
+
+
+class SingleFlight:
+    """
+    Coalesces calls by key. Concurrent callers with the same key share one
+    call; finished results are kept for `ttl_sec` so repeats are idempotent.
+    Failed calls are forgotten, so the next caller retries.
+    Keys are flight_key() tuples; safe to share across sessions and threads.
+    """
+
+    def __init__(self, ttl_sec=300, max_entries=512):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._flights = OrderedDict()  # key -> _Flight
+        self.stats = {"started": 0, "joined": 0}
+
+    def _join_or_start(self, key):
+        """Returns (flight, started_by_caller)."""
+        now = time.monotonic()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                expired = flight.done and now - flight.finished_at > self.ttl_sec
+                if not expired:
+                    self.stats["joined"] += 1
+                    return flight, False
+
+            flight = self._flights[key] = _Flight()
+            self._flights.move_to_end(key)
+            self.stats["started"] += 1
+            self._prune()
+            return flight, True
+
+    def _prune(self):
+        # Oldest first; in-flight calls are never dropped
+        for key in list(self._flights):
+            if len(self._flights) <= self.max_entries:
+                break
+            if self._flights[key].done:
+                del self._flights[key]
+
+    def _run(self, key, flight, produce):
+        try:
+            for chunk in produce():
+                flight.append(chunk)
+        except Exception as e:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(e)
+        else:
+            flight.finish()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) once per key and return its result to every caller."""
+        flight, started = self._join_or_start(key)
+        if started:
+            self._run(key, flight, lambda: [fn(*args, **kwargs)])
+        for result in flight.follow():
+            return result
+
+    def stream(self, key, fn, *args, **kwargs):
+        """
+        Shared iteration of the generator fn(*args, **kwargs). It runs on its
+        own thread so it finishes even if the caller that started it goes away
+        (e.g. a script rerun); every caller sees all chunks from the start.
+        """
+        flight, started = self._join_or_start(key)
+        if started:
+            # Copy the caller's context so calls keep their session attribution
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run,
+                args=(self._run, key, flight, lambda: fn(*args, **kwargs)),
+                name="singleflight",
+                daemon=True,
+            ).start()
+        return flight.follow()
+
+    def forget(self, session_id):
+        """Drop every remembered result for a session, e.g. when its interview restarts."""
+        with self._lock:
+            for key in [k for k in self._flights if k[0] == session_id]:
+                del self._flights[key]
+
+
+flights = SingleFlight()
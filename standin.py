@@ -0,0 +1,374 @@
+# standin.py
+# Offline stand-in for the Gemini backend: returns templated questions and
+# feedback with a configurable latency / token-rate profile, so the whole app
+# can be run and benchmarked without a key or network.
+#
+# In-process:   LLM_BACKEND=local STANDIN_PROFILE=flash streamlit run app.py
+# Over HTTP:    python standin.py --port 8765 --profile flash
+#               LLM_BACKEND=http STANDIN_URL=http://127.0.0.1:8765 streamlit run app.py
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+import urllib.request
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STANDIN_MODEL_NAME = "models/local-standin"
+
+# first_token_sec: delay before the first chunk; tokens_per_sec: output rate;
+# error_rate (optional): fraction of calls that fail with ConnectionError
+PROFILES = {
+    "instant": {"first_token_sec": 0.0, "tokens_per_sec": 0, "jitter": 0.0},
+    "flash": {"first_token_sec": 0.35, "tokens_per_sec": 150, "jitter": 0.2},
+    "pro": {"first_token_sec": 1.2, "tokens_per_sec": 50, "jitter": 0.25},
+    "slow": {"first_token_sec": 3.0, "tokens_per_sec": 20, "jitter": 0.3},
+}
+
+QUESTION_TEMPLATES = [
+    "Tell me about a recent project you worked on as a {role}. What was your part in it?",
+    "What is one skill that makes you effective as a {role}, and how have you used it?",
+    "Describe a time you had to make a difficult decision at work. How did you approach it?",
+    "How would you explain a complex idea from your work to someone outside your field?",
+    "Walk me through how you would handle a tight deadline with unclear requirements.",
+    "What's a mistake you made as a {role}, and what did you change afterwards?",
+    "How do you decide what to work on first when everything seems urgent?",
+    "Tell me about a disagreement with a teammate and how it was resolved.",
+    "Which tools or methods do you rely on most as a {role}, and why?",
+    "Where do you want to grow next as a {role}?",
+]
+
+RUBRIC = ["communication", "technical_depth", "structure", "confidence"]
+
+
+def estimate_tokens(text):
+    return max(1, (len(text) + 3) // 4)
+
+
+def _flatten(contents, system_instruction=None):
+    """Turn str or chat-turn contents into one string for pattern matching."""
+    if isinstance(contents, str):
+        text = contents
+    else:
+        text = "\n".join(
+            part if isinstance(part, str) else json.dumps(part)
+            for turn in contents
+            for part in (turn.get("parts", []) if isinstance(turn, dict) else [turn])
+        )
+    return (system_instruction or "") + "\n" + text
+
+
+def _stable_int(*parts):
+    return int(hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _last_int(pattern, text):
+    found = re.findall(pattern, text)
+    return int(found[-1]) if found else None
+
+
+def _scores(seed):
+    return {key: 5 + _stable_int(seed, key) % 4 for key in RUBRIC}
+
+
+def templated_response(prompt):
+    """Pick a plausible response for a flattened prompt from prompts.py."""
+    role_match = re.search(r"- Role: (.+)", prompt)
+    role = role_match.group(1).strip() if role_match else "candidate"
+
+    if "scoring ONE answer" in prompt:
+        return json.dumps({
+            "scores": _scores(prompt),
+            "summary": "A clear answer that could use one more concrete example.",
+            "strengths": ["Stayed on topic"],
+            "areas_to_improve": ["Quantify the impact of your work"],
+        })
+
+    if "opening questions" in prompt and "JSON array" in prompt:
+        count = _last_int(r"Write (\d+) different", prompt) or 5
+        return json.dumps([t.format(role=role) for t in QUESTION_TEMPLATES[:count]])
+
+    if "expert interview coach" in prompt:
+        return json.dumps({
+            "overall_summary": (
+                f"The candidate answered consistently for a {role} interview. "
+                "Answers were generally structured and relevant. "
+                "More specific examples and measurable outcomes would strengthen them."
+            ),
+            "scores": _scores(prompt),
+            "strengths": ["Clear communication", "Relevant examples"],
+            "areas_to_improve": [
+                "Use the STAR method more consistently",
+                "Quantify results",
+                "Keep answers more concise",
+            ],
+            "next_practice_tasks": [
+                "Prepare three STAR stories with measurable outcomes",
+                "Practise two-minute answers with a timer",
+            ],
+        })
+
+    question_number = _last_int(r'"question_number":\s*(\d+)', prompt) or 0
+    max_questions = _last_int(r'"max_questions":\s*(\d+)', prompt)
+    if max_questions is not None and question_number >= max_questions:
+        return "INTERVIEW_COMPLETE"
+
+    template = QUESTION_TEMPLATES[(question_number + _stable_int(role)) % len(QUESTION_TEMPLATES)]
+    return template.format(role=role)
+
+
+class StandinModel:
+    """Mimics the parts of GenerativeModel the agent uses."""
+
+    def __init__(self, model_name, system_instruction=None, profile=None, responder=templated_response, seed=None):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.profile = dict(profile or PROFILES["instant"])
+        self.responder = responder
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _jittered(self, seconds):
+        jitter = self.profile.get("jitter", 0.0)
+        if not seconds or not jitter:
+            return seconds
+        with self._rng_lock:
+            return seconds * self._rng.uniform(1 - jitter, 1 + jitter)
+
+    def _plan(self, contents):
+        """Returns (text, usage, list of (delay_sec, chunk_text))."""
+        error_rate = self.profile.get("error_rate", 0.0)
+        if error_rate:
+            with self._rng_lock:
+                failed = self._rng.random() < error_rate
+            if failed:
+                raise ConnectionError("Stand-in injected failure")
+
+        prompt = _flatten(contents, self.system_instruction)
+        text = self.responder(prompt)
+
+        words = re.findall(r"\S+\s*", text) or [text]
+        rate = self.profile.get("tokens_per_sec") or 0
+        steps = []
+        for i in range(0, len(words), 4):
+            chunk = "".join(words[i:i + 4])
+            delay = estimate_tokens(chunk) / rate if rate else 0.0
+            if i == 0:
+                delay += self.profile.get("first_token_sec", 0.0)
+            steps.append((self._jittered(delay), chunk))
+
+        usage = SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt),
+            candidates_token_count=estimate_tokens(text),
+            total_token_count=estimate_tokens(prompt) + estimate_tokens(text),
+        )
+        return text, usage, steps
+
+    @staticmethod
+    def _check_deadline(elapsed, request_options):
+        timeout = (request_options or {}).get("timeout")
+        if timeout and elapsed > timeout:
+            raise TimeoutError(f"Stand-in response took longer than {timeout}s")
+
+    def generate_content(self, contents, stream=False, request_options=None, **kwargs):
+        text, usage, steps = self._plan(contents)
+        if stream:
+            return self._stream(steps, usage, request_options)
+
+        total = sum(delay for delay, _ in steps)
+        timeout = (request_options or {}).get("timeout")
+        time.sleep(min(total, timeout) if timeout else total)
+        self._check_deadline(total, request_options)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def _stream(self, steps, usage, request_options):
+        elapsed = 0.0
+        for delay, chunk in steps:
+            time.sleep(delay)
+            elapsed += delay
+            self._check_deadline(elapsed, request_options)
+            yield SimpleNamespace(text=chunk, usage_metadata=usage)
+
+    async def generate_content_async(self, contents, request_options=None, **kwargs):
+        text, usage, steps = self._plan(contents)
+        total = sum(delay for delay, _ in steps)
+        timeout = (request_options or {}).get("timeout")
+        await asyncio.sleep(min(total, timeout) if timeout else total)
+        self._check_deadline(total, request_options)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class LocalBackend:
+    """In-process stand-in backend."""
+
+    name = "local"
+    fixed_model_name = STANDIN_MODEL_NAME
+
+    def __init__(self, profile="instant", responder=templated_response, seed=0):
+        self.profile = PROFILES[profile] if isinstance(profile, str) else dict(profile)
+        self.responder = responder
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls):
+        profile = dict(PROFILES[os.getenv("STANDIN_PROFILE", "flash")])
+        if os.getenv("STANDIN_FIRST_TOKEN_SEC"):
+            profile["first_token_sec"] = float(os.getenv("STANDIN_FIRST_TOKEN_SEC"))
+        if os.getenv("STANDIN_TOKENS_PER_SEC"):
+            profile["tokens_per_sec"] = float(os.getenv("STANDIN_TOKENS_PER_SEC"))
+        if os.getenv("STANDIN_ERROR_RATE"):
+            profile["error_rate"] = float(os.getenv("STANDIN_ERROR_RATE"))
+        return cls(profile=profile)
+
+    def list_models(self):
+        return [STANDIN_MODEL_NAME]
+
+    def create_model(self, model_name, system_instruction=None):
+        return StandinModel(model_name, system_instruction, self.profile, self.responder, self.seed)
+
+
+# ---- HTTP variant ----
+
+class HttpModel:
+    """Client for the stand-in server, with the same surface as StandinModel."""
+
+    def __init__(self, base_url, model_name, system_instruction=None):
+        self.base_url = base_url.rstrip("/")
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+
+    def _request(self, contents, stream, request_options):
+        body = json.dumps({
+            "model": self.model_name,
+            "system_instruction": self.system_instruction,
+            "contents": contents,
+            "stream": stream,
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + "/v1/generate", data=body, headers={"Content-Type": "application/json"}
+        )
+        timeout = (request_options or {}).get("timeout") or 600
+        return urllib.request.urlopen(request, timeout=timeout)
+
+    @staticmethod
+    def _usage(data):
+        return SimpleNamespace(**data["usage"]) if data.get("usage") else None
+
+    def generate_content(self, contents, stream=False, request_options=None, **kwargs):
+        if stream:
+            return self._stream(contents, request_options)
+        with self._request(contents, False, request_options) as resp:
+            data = json.loads(resp.read())
+        return SimpleNamespace(text=data["text"], usage_metadata=self._usage(data))
+
+    def _stream(self, contents, request_options):
+        with self._request(contents, True, request_options) as resp:
+            for line in resp:
+                if line.strip():
+                    data = json.loads(line)
+                    yield SimpleNamespace(text=data["text"], usage_metadata=self._usage(data))
+
+    async def generate_content_async(self, contents, request_options=None, **kwargs):
+        return await asyncio.to_thread(self.generate_content, contents, False, request_options)
+
+
+class HttpBackend:
+    name = "http"
+    fixed_model_name = STANDIN_MODEL_NAME
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def list_models(self):
+        return [STANDIN_MODEL_NAME]
+
+    def create_model(self, model_name, system_instruction=None):
+        return HttpModel(self.base_url, model_name, system_instruction)
+
+
+def make_handler(backend):
+    class StandinHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "profile": backend.profile})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/v1/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            model = backend.create_model(req.get("model"), req.get("system_instruction"))
+
+            if not req.get("stream"):
+                response = model.generate_content(req["contents"])
+                self._send_json(200, {"text": response.text, "usage": vars(response.usage_metadata)})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for chunk in model.generate_content(req["contents"], stream=True):
+                line = json.dumps({"text": chunk.text, "usage": vars(chunk.usage_metadata)}) + "\n"
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StandinHandler
+
+
+def serve(host="127.0.0.1", port=8765, backend=None):
+    """Start the stand-in server in a background thread. Returns the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(backend or LocalBackend.from_env()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Gemini API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="flash")
+    parser.add_argument("--first-token-sec", type=float, help="override the profile's first-token delay")
+    parser.add_argument("--tokens-per-sec", type=float, help="override the profile's output rate")
+    parser.add_argument("--error-rate", type=float, help="fraction of calls that fail")
+    args = parser.parse_args(argv)
+
+    profile = dict(PROFILES[args.profile])
+    if args.first_token_sec is not None:
+        profile["first_token_sec"] = args.first_token_sec
+    if args.tokens_per_sec is not None:
+        profile["tokens_per_sec"] = args.tokens_per_sec
+    if args.error_rate is not None:
+        profile["error_rate"] = args.error_rate
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(LocalBackend(profile=profile)))
+    server.daemon_threads = True
+    print(f"Stand-in serving {STANDIN_MODEL_NAME} on http://{args.host}:{args.port} ({profile})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# conftest.py
+# Tests run offline: the in-process stand-in model, no response cache, no
+# session store and no rate limits. Set before any app module is imported,
+# since they read their settings at import time.
+import os
+import sys
+
+os.environ.update({
+    "LLM_BACKEND": "local",
+    "STANDIN_PROFILE": "instant",
+    "RESPONSE_CACHE": "0",
+    "SESSION_STORE": "0",
+    "RATE_LIMIT_RPM": "0",
+    "RATE_LIMIT_TPM": "0",
+})
+
+# The app modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+import math
+
+from analytics import answer_metrics, answer_signals
+
+
+def item(answer, seconds=None):
+    return {"question": "Q", "answer": answer, "response_time_sec": seconds}
+
+
+def test_metrics_per_answer():
+    m = answer_metrics([
+        item("um I mean we used caching you know", 60),
+        item("the cache the cache the cache", 0),
+        item(""),
+    ])
+    assert list(m["words"]) == [8, 6, 0]
+    assert m["wpm"][0] == 8.0
+    assert math.isnan(m["wpm"][1]) and math.isnan(m["wpm"][2])
+    assert m["filler_rate"][0] == 3 / 8
+    assert m["diversity"][1] == 2 / 6
+    assert m["repetition"][1] == 3 / 5
+    assert math.isnan(m["filler_rate"][2])
+
+
+def test_word_pairs_do_not_cross_answers():
+    m = answer_metrics([item("you"), item("know")])
+    assert list(m["filler_rate"]) == [0, 0]
+
+
+def test_role_keyword_coverage():
+    m = answer_metrics([
+        item("I wrote tests and improved latency."),
+        item("I picked a data structure for scaling."),
+    ], role="Software Engineer")
+    assert list(m["keywords"]) == [2, 2]
+    assert set(m["covered"]) == {"test", "latenc", "data structure", "scal"}
+    assert "api" in m["uncovered"]
+
+
+def test_signals_flag_the_latest_answer():
+    history = [item("A long and careful answer " * 10, 60), item("um short um", 0.5)]
+    signals = answer_signals(history, "Software Engineer", per_answer=True)
+    assert signals["latest"]["words"] == 3
+    assert signals["latest"]["flags"] == ["short", "fast", "fillers"]
+    assert signals["overall"]["answers"] == 2
+    assert signals["overall"]["short_answers"] == 1
+    assert 0 <= signals["overall"]["keyword_coverage"] <= 1
+    assert signals["per_answer"]["words"] == [50, 3]
+
+
+def test_unknown_values_raise_no_flags():
+    signals = answer_signals([item("")])
+    assert signals["latest"]["wpm"] is None
+    assert signals["latest"]["flags"] == ["short"]
+    assert signals["overall"]["avg_wpm"] is None
+    assert "keyword_coverage" not in signals["overall"]
+    assert answer_signals([]) is None
@@ -0,0 +1,43 @@
+import agent
+from compaction import HistoryCompactor
+from metrics import registry
+
+
+def history(turns, words=200):
+    return [{"question": f"Question {n}?", "answer": "word " * words} for n in range(turns)]
+
+
+def test_compact_keeps_recent_turns_and_fits_budget():
+    compactor = HistoryCompactor(budget_tokens=1000, keep_recent=2)
+    summary, recent, stats = compactor.compact(history(8))
+    folded = stats["folded_turns"]
+    assert 0 < folded <= 6
+    assert recent == history(8)[folded:]
+    assert summary.count("Q: Question") == folded
+    assert stats["tokens_after"] <= 1000 < stats["tokens_before"]
+
+
+def test_small_history_is_left_alone():
+    compactor = HistoryCompactor(budget_tokens=1000)
+    summary, recent, stats = compactor.compact(history(2, words=5))
+    assert summary is None and stats["bytes_saved"] == 0
+
+
+def test_snapshot_totals_what_was_saved():
+    compactor = HistoryCompactor(budget_tokens=1000, keep_recent=2)
+    _, _, first = compactor.compact(history(8))
+    compactor.compact(history(1))
+    totals = compactor.snapshot()
+    assert totals["calls"] == 2 and totals["compacted_calls"] == 1
+    assert totals["bytes_saved"] == first["bytes_saved"]
+    assert totals["tokens_saved"] == first["tokens_saved"]
+
+
+def test_agent_reports_savings_to_the_registry():
+    def saved():
+        return registry._counters.get(("interview_history_bytes_saved_total", (("prompt", "question"),)), 0)
+
+    before = saved()
+    agent._compact(history(10), 500, "question")
+    assert saved() > before
+    assert "interview_history_tokens_bucket" in registry.render_prometheus()
@@ -0,0 +1,83 @@
+import json
+
+import agent
+from agent import FeedbackResult, SCORE_KEYS
+from jsonstream import IncrementalObjectParser
+
+FEEDBACK = {
+    "overall_summary": "Clear and \"structured\" answers.",
+    "scores": {"communication": 7, "technical_depth": 6, "structure": 5, "confidence": 8},
+    "strengths": ["Clear examples"],
+    "areas_to_improve": ["Quantify results"],
+    "next_practice_tasks": ["Practise STAR stories"],
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalObjectParser()
+    snapshots = []
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+        snapshots.append((dict(parser.fields), parser.partial, parser.done))
+    return parser, snapshots
+
+
+def test_parser_matches_json_loads_for_any_chunking():
+    text = json.dumps(FEEDBACK)
+    for size in (1, 2, 7, len(text)):
+        parser, _ = feed_in_chunks(text, size)
+        assert parser.done
+        assert parser.fields == FEEDBACK
+
+
+def test_parser_skips_code_fences_and_prose():
+    parser, _ = feed_in_chunks("Here you go:\n```json\n" + json.dumps(FEEDBACK) + "\n```", 5)
+    assert parser.fields == FEEDBACK
+
+
+def test_parser_reports_partial_string_member():
+    parser = IncrementalObjectParser()
+    parser.feed('{"overall_summary": "Clear and \\"struc')
+    assert parser.fields == {}
+    assert parser.partial == ("overall_summary", 'Clear and "struc')
+    assert not parser.done
+
+
+def test_fields_appear_in_order_as_they_complete():
+    _, snapshots = feed_in_chunks(json.dumps(FEEDBACK), 3)
+    seen = [list(fields) for fields, _, _ in snapshots]
+    assert seen[-1] == list(FEEDBACK)
+    assert any(keys == ["overall_summary"] for keys in seen)
+
+
+def test_from_text_clamps_scores_and_drops_unknown_keys():
+    result = FeedbackResult.from_text(json.dumps({
+        "overall_summary": " ok ",
+        "scores": {"communication": 12, "structure": -1, "confidence": "7.5", "charisma": 9},
+        "strengths": ["a", "", 3],
+    }))
+    assert result.overall_summary == "ok"
+    assert result.scores == {"communication": 10.0, "structure": 0.0, "confidence": 7.5}
+    assert result.strengths == ["a", "3"]
+    assert result.raw_text is None
+
+
+def test_from_text_tolerates_malformed_scores():
+    for scores in ([7, 6], "7/10", None, {"communication": None, "structure": "n/a", "confidence": float("nan")}):
+        result = FeedbackResult.from_text(json.dumps({"overall_summary": "ok", "scores": scores}))
+        assert result.scores == {}
+        assert result.overall_summary == "ok"
+
+
+def test_unparseable_text_is_kept_raw():
+    assert FeedbackResult.from_text("not json").raw_text == "not json"
+    assert FeedbackResult.from_text("[1, 2]").raw_text == "[1, 2]"
+
+
+def test_stream_feedback_ends_with_complete_result():
+    history = [{"question": "Tell me about a project.", "answer": "I built a cache for our API."}]
+    results = list(agent.stream_feedback("Software Engineer", "Technical", history))
+    final = results[-1]
+    assert final.complete and final.raw_text is None
+    assert set(final.scores) == set(SCORE_KEYS)
+    assert all(not partial.complete for partial in results[:-1])
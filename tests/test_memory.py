@@ -0,0 +1,101 @@
+import gc
+import os
+
+from streamlit.testing.v1 import AppTest
+
+import memory
+from memory import SessionMemoryManager, Turn, compact_history, deep_sizeof, plain_history, purge_widget_keys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+ITEM = {"question": "Tell me about a project.", "answer": "I built a cache.",
+        "answer_word_count": 4, "response_time_sec": 12.5}
+
+
+class FakeState(dict):
+    """Stands in for Streamlit's SessionState: a mapping that lists user keys via filtered_state."""
+
+    @property
+    def filtered_state(self):
+        return dict(self)
+
+
+def session(status="in_progress", turns=20):
+    return FakeState(status=status, question_number=3, history=compact_history([ITEM] * turns),
+                     feedback={"overall_summary": "ok"} if status == "finished" else None,
+                     answer_2="old draft", answer_3="current draft")
+
+
+def test_turn_reads_like_the_dict_it_replaces():
+    turn = Turn.from_item(ITEM)
+    assert turn["answer"] == ITEM["answer"]
+    assert turn.get("missing") is None
+    assert dict(turn) == ITEM
+    assert Turn.from_item(turn) is turn
+    assert plain_history([turn]) == [ITEM]
+    assert deep_sizeof(turn) < deep_sizeof(dict(ITEM))
+
+
+def test_purge_widget_keys_keeps_current_answer():
+    state = FakeState(answer_1="a", answer_2="b", answer_3="c", role="x")
+    assert purge_widget_keys(state, 3) == 2
+    assert state == {"answer_3": "c", "role": "x"}
+
+
+def test_finished_idle_sessions_are_offloaded():
+    manager = SessionMemoryManager(budget_bytes=10 ** 9, idle_sec=0, offload_sec=0)
+    finished, active = session("finished"), session()
+    manager.touch("finished", None, finished)
+    manager.touch("active", None, active)
+    manager.enforce()
+    assert finished["offloaded"] and finished["history"] == [] and finished["feedback"] is None
+    assert "answer_2" not in finished and finished["answer_3"] == "current draft"
+    assert "offloaded" not in active and len(active["history"]) == 20
+    assert manager.stats == {"offloaded": 1, "evicted": 0}
+
+
+def test_over_budget_evicts_only_idle_sessions():
+    manager = SessionMemoryManager(budget_bytes=0, idle_sec=3600, offload_sec=3600)
+    state = session()
+    manager.touch("s1", None, state)
+    manager.enforce()
+    assert "offloaded" not in state
+
+    manager.idle_sec = 0
+    manager.enforce()
+    assert state["offloaded"] and state["history"] == []
+    assert manager.stats["evicted"] == 1
+
+
+def test_nothing_is_dropped_without_a_store():
+    manager = SessionMemoryManager(budget_bytes=0, idle_sec=0, offload_sec=0, can_reload=lambda: False)
+    state = session("finished")
+    manager.touch("s1", None, state)
+    manager.enforce()
+    assert "offloaded" not in state
+
+
+def test_closed_sessions_are_forgotten(monkeypatch):
+    monkeypatch.setattr(memory, "session_connected", lambda runtime_id: runtime_id != "closed")
+    manager = SessionMemoryManager()
+    manager.touch("s1", "closed", session())
+    manager.touch("s2", "open", session())
+    assert [session_id for session_id, _, _ in manager._live()] == ["s2"]
+    assert [row["session"] for row in manager.report()] == ["s2"]
+
+
+def test_app_session_stays_tracked_across_script_runs(monkeypatch):
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    next(b for b in at.button if b.label.startswith("🚀")).click().run()
+    # Each run wraps the session's state in a new SafeSessionState that is dropped afterwards
+    at.run()
+    gc.collect()
+
+    live = {session_id: state for session_id, state, _ in memory.manager._live()}
+    assert live[at.session_state["session_id"]] is at._session_state._state
+
+    monkeypatch.setattr(memory.manager, "budget_bytes", 0)
+    monkeypatch.setattr(memory.manager, "idle_sec", 0)
+    monkeypatch.setattr(memory.manager, "can_reload", lambda: True)
+    memory.manager.enforce()
+    assert at.session_state["offloaded"]
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import agent
+from metrics import CallTracker, MetricsRegistry
+
+
+def calls(registry, outcome):
+    return sum(value for (name, labels), value in registry._counters.items()
+               if name == "interview_llm_calls_total" and ("outcome", outcome) in labels)
+
+
+def errors(registry):
+    return sum(value for (name, _), value in registry._counters.items() if name == "interview_llm_errors_total")
+
+
+@pytest.mark.parametrize("exc", [GeneratorExit, asyncio.CancelledError])
+def test_abandoned_calls_are_cancelled_not_errors(exc):
+    registry = MetricsRegistry()
+    with pytest.raises(exc):
+        with CallTracker("question", "m", "prompt", registry=registry):
+            raise exc()
+    assert calls(registry, "cancelled") == 1
+    assert errors(registry) == 0
+
+
+def test_failed_calls_are_errors():
+    registry = MetricsRegistry()
+    with pytest.raises(ValueError):
+        with CallTracker("question", "m", "prompt", registry=registry):
+            raise ValueError()
+    assert calls(registry, "error") == 1
+    labels = (("error", "ValueError"), ("model", "m"), ("site", "question"))
+    assert registry._counters[("interview_llm_errors_total", labels)] == 1
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.settled = []
+
+    def acquire(self, tokens, task, session, timeout):
+        return 0.0
+
+    def settle(self, reserved, used):
+        self.settled.append((reserved, used))
+
+
+def test_stream_closed_early_still_settles(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(agent, "_rate_limiter", lambda model_name: limiter)
+    stream = agent._generate_stream("Ask me one interview question.", "question")
+    next(stream)
+    stream.close()
+    [(reserved, used)] = limiter.settled
+    assert 0 < used < reserved
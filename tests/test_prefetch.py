@@ -0,0 +1,85 @@
+import threading
+import time
+
+from prefetch import QuestionPrefetcher, question_key
+from ratelimit import is_speculative
+
+
+class RecordingFetch:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, role, interview_type, history, question_number, max_questions):
+        with self.lock:
+            self.calls.append([item["answer"] for item in history])
+        return f"Question after {len(history)} answers"
+
+
+def args(*answers):
+    history = [{"question": f"Q{i}", "answer": a} for i, a in enumerate(answers)]
+    return ("Software Engineer", "Mixed", history, len(history), 5)
+
+
+def test_key_ignores_timing_stats():
+    role, interview_type, history, number, max_questions = args("an answer")
+    timed = [dict(history[0], answer_word_count=2, response_time_sec=12.5)]
+    assert question_key(role, interview_type, history, number, max_questions) == \
+        question_key(role, interview_type, timed, number, max_questions)
+
+
+def test_prefetch_then_take():
+    fetch = RecordingFetch()
+    prefetcher = QuestionPrefetcher(fetch=fetch)
+    prefetcher.prefetch(*args("a"))
+    prefetcher.prefetch(*args("a"))  # same state: not started twice
+    assert prefetcher.take(*args("a"), timeout=5) == "Question after 1 answers"
+    assert fetch.calls == [["a"]]
+    assert prefetcher.take(*args("a")) is None  # taken once
+
+
+def test_delayed_drafts_only_start_once_settled():
+    fetch = RecordingFetch()
+    prefetcher = QuestionPrefetcher(fetch=fetch)
+    for draft in ("I", "I built", "I built an API"):
+        key = prefetcher.prefetch(*args(draft), delay=0.2)
+        prefetcher.retain([key])  # each edit drops the previous draft
+    time.sleep(0.5)
+    assert fetch.calls == [["I built an API"]]
+    assert prefetcher.take(*args("I built an API"), timeout=5) == "Question after 1 answers"
+
+
+def test_undelayed_prefetch_starts_a_pending_draft_now():
+    fetch = RecordingFetch()
+    prefetcher = QuestionPrefetcher(fetch=fetch)
+    prefetcher.prefetch(*args("final transcript"), delay=60)
+    prefetcher.prefetch(*args("final transcript"))
+    assert prefetcher.take(*args("final transcript"), timeout=5) == "Question after 1 answers"
+    assert fetch.calls == [["final transcript"]]
+
+
+def test_take_of_a_draft_still_waiting_is_a_miss():
+    fetch = RecordingFetch()
+    prefetcher = QuestionPrefetcher(fetch=fetch)
+    prefetcher.prefetch(*args("draft"), delay=0.2)
+    assert prefetcher.take(*args("draft")) is None
+    time.sleep(0.4)
+    assert fetch.calls == []
+
+
+def test_failed_prefetch_is_a_miss():
+    def failing(*_):
+        raise RuntimeError("model down")
+
+    prefetcher = QuestionPrefetcher(fetch=failing)
+    prefetcher.prefetch(*args("a"))
+    assert prefetcher.take(*args("a"), timeout=5) is None
+
+
+def test_prefetch_calls_are_speculative_and_callers_are_not():
+    seen = []
+    prefetcher = QuestionPrefetcher(fetch=lambda *a: seen.append(is_speculative()) or "q")
+    prefetcher.prefetch(*args("a"))
+    assert prefetcher.take(*args("a"), timeout=5) == "q"
+    assert seen == [True]
+    assert not is_speculative()
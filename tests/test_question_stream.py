@@ -0,0 +1,37 @@
+from agent import INTERVIEW_COMPLETE, filter_question_stream
+
+
+def run(chunks):
+    return list(filter_question_stream(chunks))
+
+
+def test_passes_text_through_without_leading_whitespace():
+    assert "".join(run(["\n  ", " What is", " a hash map?"])) == "What is a hash map?"
+
+
+def test_whitespace_only_stream_yields_nothing():
+    assert run([" ", "\n", ""]) == []
+
+
+def test_sentinel_alone():
+    assert run([INTERVIEW_COMPLETE]) == [INTERVIEW_COMPLETE]
+
+
+def test_sentinel_split_across_chunks_is_never_leaked():
+    out = run(["INTERVIEW", "_COM", "PLETE"])
+    assert out == [INTERVIEW_COMPLETE]
+
+
+def test_text_before_sentinel_comes_first():
+    out = run(["Thanks for your time. INTERVIEW_", "COMPLETE and more"])
+    assert out[-1] == INTERVIEW_COMPLETE
+    assert "".join(out[:-1]).strip() == "Thanks for your time."
+
+
+def test_sentinel_prefix_that_never_completes_is_released():
+    assert "".join(run(["Tell me about INTERVIEW", " prep"])) == "Tell me about INTERVIEW prep"
+
+
+def test_one_character_chunks():
+    text = "How do you handle conflict?"
+    assert "".join(run(list(text))) == text
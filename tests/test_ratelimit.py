@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from ratelimit import RateLimiter, RateLimitTimeout, _apply
+
+
+def test_apply_takes_from_both_buckets():
+    levels, wait = _apply([10.0, 1000.0], (10, 1000), (1, 300), elapsed=0)
+    assert wait == 0
+    assert levels == [9.0, 700.0]
+
+
+def test_apply_reports_wait_without_taking():
+    levels, wait = _apply([0.0, 1000.0], (60, 1000), (1, 10), elapsed=0)
+    assert wait == pytest.approx(1.0)
+    assert levels == [0.0, 1000.0]
+
+
+def test_apply_refills_and_caps_at_limit():
+    levels, wait = _apply([0.0, 0.0], (60, 600), (0, 0), elapsed=3600)
+    assert wait == 0
+    assert levels == [60.0, 600.0]
+
+
+def test_zero_limit_is_unlimited():
+    levels, wait = _apply([0.0, 0.0], (0, 0), (1, 10 ** 9), elapsed=0)
+    assert wait == 0
+
+
+def test_oversized_request_waits_for_full_bucket_only():
+    _, wait = _apply([0.0, 0.0], (0, 600), (1, 6000), elapsed=0)
+    assert wait == pytest.approx(60.0)
+
+
+def test_acquire_times_out_when_bucket_is_empty():
+    limiter = RateLimiter("test", rpm=1)
+    assert limiter.acquire(0, timeout=1) == pytest.approx(0, abs=0.05)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(0, timeout=0.1)
+    assert limiter.snapshot()["granted"] == 1
+    assert limiter.snapshot()["timeouts"] == 1
+    assert limiter.snapshot()["waiting"] == 0
+
+
+def test_acquire_async_times_out_too():
+    limiter = RateLimiter("test", rpm=1)
+
+    async def run():
+        await limiter.acquire_async(0, timeout=1)
+        await limiter.acquire_async(0, timeout=0.1)
+
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(run())
+
+
+def test_settle_refunds_overestimated_tokens():
+    limiter = RateLimiter("test", tpm=1000)
+    limiter.acquire(1000, timeout=1)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(500, timeout=0.05)
+    limiter.settle(reserved=1000, used=200)
+    limiter.acquire(500, timeout=0.5)
+
+
+def test_head_prefers_priority_then_least_recently_served_session():
+    limiter = RateLimiter("test")
+    feedback = limiter._enqueue("feedback", "a", 10)
+    first = limiter._enqueue("question", "a", 10)
+    second = limiter._enqueue("question", "b", 10)
+    assert limiter._head() is first
+    limiter._last_served["a"] = 1.0
+    assert limiter._head() is second
+    limiter._dequeue(first)
+    limiter._dequeue(second)
+    assert limiter._head() is feedback
+
+
+def test_prefetch_waits_behind_everything_else():
+    limiter = RateLimiter("test")
+    prefetch = limiter._enqueue("prefetch", "a", 10)
+    feedback = limiter._enqueue("feedback", "b", 10)
+    assert limiter._head() is feedback
+    limiter._dequeue(feedback)
+    assert limiter._head() is prefetch
+
+
+def test_shared_buckets_span_limiters(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    one = RateLimiter("model", rpm=1, db_path=path)
+    two = RateLimiter("model", rpm=1, db_path=path)
+    one.acquire(0, timeout=1)
+    with pytest.raises(RateLimitTimeout):
+        two.acquire(0, timeout=0.1)
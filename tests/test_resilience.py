@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, DeadlineExceeded, ResilientCaller
+
+
+class ServiceUnavailable(Exception):
+    """Transient, by class name."""
+
+
+class NotFound(Exception):
+    """Model unavailable, by class name."""
+
+
+def caller(**kwargs):
+    kwargs.setdefault("backoff_base_sec", 0.0)
+    return ResilientCaller(**kwargs)
+
+
+def flaky(failures, error=ServiceUnavailable):
+    """Attempt that fails `failures` times, then answers with the model name."""
+    calls = []
+
+    def attempt(model_name, timeout):
+        calls.append(model_name)
+        if len(calls) <= failures:
+            raise error("try again")
+        return f"answer from {model_name}"
+
+    return attempt, calls
+
+
+def test_transient_errors_are_retried():
+    attempt, calls = flaky(2)
+    result, model = caller(max_attempts=3).call("question", ["m1"], attempt, 10)
+    assert (result, model) == ("answer from m1", "m1")
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts():
+    attempt, calls = flaky(5)
+    with pytest.raises(ServiceUnavailable):
+        caller(max_attempts=2).call("question", ["m1"], attempt, 10)
+    assert len(calls) == 2
+
+
+def test_other_errors_are_not_retried():
+    attempt, calls = flaky(1, error=ValueError)
+    with pytest.raises(ValueError):
+        caller().call("question", ["m1"], attempt, 10)
+    assert calls == ["m1"]
+
+
+def test_unavailable_model_fails_over_to_the_next():
+    attempt, calls = flaky(1, error=NotFound)
+    result, model = caller().call("question", ["m1", "m2"], attempt, 10)
+    assert model == "m2"
+    assert calls == ["m1", "m2"]
+
+
+def test_deadline_stops_retries():
+    def slow(model_name, timeout):
+        time.sleep(0.05)
+        raise ServiceUnavailable()
+
+    with pytest.raises((DeadlineExceeded, ServiceUnavailable)):
+        caller(max_attempts=100).call("question", ["m1"], slow, 0.2)
+
+
+def test_breaker_opens_then_half_opens_after_cooldown():
+    breaker = CircuitBreaker("m1", failure_threshold=2, cooldown_sec=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # only one trial call
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_async_call_retries():
+    calls = []
+
+    async def attempt(model_name, timeout):
+        calls.append(model_name)
+        if len(calls) == 1:
+            raise ServiceUnavailable()
+        return "ok"
+
+    result, model = asyncio.run(caller().call_async("question", ["m1"], attempt, 10))
+    assert (result, model, len(calls)) == ("ok", "m1", 2)
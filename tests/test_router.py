@@ -0,0 +1,42 @@
+from router import ModelRouter
+
+MODELS = ["gemini-1.5-flash", "gemini-1.5-flash-latest", "gemini-1.5-pro", "gemini-1.5-pro-latest", "gemini-1.0-pro"]
+
+
+def test_untried_models_are_probed_at_most_once_per_interval():
+    router = ModelRouter()
+    firsts = []
+    for _ in range(5):
+        ordered = router.route("question", MODELS)
+        firsts.append(ordered[0])
+        router.record("question", ordered[0], 1.0, ok=True)
+    assert firsts == [MODELS[0]] * 5
+
+
+def test_probe_throttle_is_per_task():
+    router = ModelRouter()
+    router.route("question", MODELS)
+    for model in MODELS[:2]:
+        for _ in range(3):
+            router.record("feedback", model, 1.0, ok=True)
+    assert router.route("feedback", MODELS)[0] == "gemini-1.5-pro"
+
+
+def test_demoted_model_is_probed_again_after_the_interval():
+    router = ModelRouter(reprobe_interval_sec=0)
+    for _ in range(3):
+        router.record("question", "gemini-1.5-flash", 9.0, ok=True)
+        router.record("question", "gemini-1.5-pro", 2.0, ok=True)
+    assert router.route("question", ["gemini-1.5-flash", "gemini-1.5-pro"])[0] == "gemini-1.5-flash"
+
+    router.reprobe_interval_sec = 300
+    assert router.route("question", ["gemini-1.5-flash", "gemini-1.5-pro"]) == ["gemini-1.5-pro", "gemini-1.5-flash"]
+
+
+def test_models_below_the_quality_floor_are_never_probed():
+    router = ModelRouter()
+    for _ in range(3):
+        router.record("feedback", "gemini-1.5-flash", 1.0, ok=True)
+    assert router.route("feedback", ["gemini-1.0-pro", "gemini-1.5-flash"]) == ["gemini-1.5-flash", "gemini-1.0-pro"]
+    # Nothing meets the floor: the candidates are used as given, still without a probe
+    assert router.route("feedback", ["gemini-1.0-pro"]) == ["gemini-1.0-pro"]
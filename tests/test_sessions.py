@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from sessions import SessionStore, replay
+
+START = {"role": "Data Analyst", "interview_type": "Behavioral", "max_questions": 3}
+ITEM = {"question": "Q1", "answer": "A1"}
+
+
+def test_replay_rebuilds_an_interview():
+    state = replay([
+        ("start", START, 1.0),
+        ("question", {"text": "Q1", "number": 1}, 2.0),
+        ("answer", {"item": ITEM, "number": 1}, 3.0),
+        ("question", {"text": "Q2", "number": 2}, 4.0),
+    ])
+    assert state["status"] == "in_progress"
+    assert state["chat_mode"] is False
+    assert state["history"] == [ITEM]
+    assert state["current_question"] == "Q2"
+    assert state["question_number"] == 2
+    assert state["question_start_time"] == 4.0
+    assert state["submitted_question"] == 1
+
+
+def test_replay_finish_and_feedback():
+    state = replay([
+        ("start", START, 1.0),
+        ("question", {"text": "Q1", "number": 1}, 2.0),
+        ("skip", {"number": 1}, 3.0),
+        ("finish", {}, 4.0),
+        ("feedback", {"overall_summary": "ok"}, 5.0),
+    ])
+    assert state["status"] == "finished"
+    assert state["current_question"] == ""
+    assert state["question_start_time"] is None
+    assert state["submitted_question"] == 1
+    assert state["feedback"] == {"overall_summary": "ok"}
+
+
+def test_replay_restart_and_orphan_events():
+    assert replay([("start", START, 1.0), ("restart", {}, 2.0)]) is None
+    assert replay([("question", {"text": "Q1", "number": 1}, 1.0)]) is None
+    state = replay([("answer", {"item": ITEM, "number": 1}, 1.0), ("start", START, 2.0)])
+    assert state["history"] == []
+
+
+def test_store_round_trip(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"), flush_sec=0.01)
+    store.record("s1", "start", START)
+    store.record("s1", "question", {"text": "Q1", "number": 1})
+    store.record("s1", "answer", {"item": ITEM, "number": 1})
+    store.record("s2", "start", START)
+    state = store.load("s1")
+    assert state["history"] == [ITEM]
+    assert state["role"] == "Data Analyst"
+    assert store.stats["events"] == 4
+    assert store.load("missing") is None
+
+
+def test_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SessionStore(path, flush_sec=0.01)
+    first.record("s1", "start", START)
+    first.flush()
+    assert SessionStore(path).load("s1")["max_questions"] == 3
+
+
+def test_prune_drops_idle_sessions(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"), flush_sec=0.01)
+    store.record("s1", "start", START)
+    store.flush()
+    time.sleep(0.05)
+    store.prune(0.01)
+    assert store.load("s1") is None
+
+
+def test_disabled_store_keeps_nothing():
+    store = SessionStore(None)
+    assert not store.enabled
+    store.record("s1", "start", START)
+    assert store.load("s1") is None
+
+
+def test_unknown_event_kind_is_rejected(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"))
+    with pytest.raises(ValueError):
+        store.record("s1", "typo", {})
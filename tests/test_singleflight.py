@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from singleflight import SingleFlight, flight_key
+
+
+def test_do_runs_once_per_key():
+    flights = SingleFlight()
+    calls = []
+    key = flight_key("s1", 1, "h")
+    assert flights.do(key, lambda: calls.append(1) or "q") == "q"
+    assert flights.do(key, lambda: calls.append(1) or "other") == "q"
+    assert calls == [1]
+    assert flights.stats == {"started": 1, "joined": 1}
+
+
+def test_failed_calls_are_forgotten():
+    flights = SingleFlight()
+    key = flight_key("s1", 1, "h")
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flights.do(key, fail)
+    assert flights.do(key, lambda: "retried") == "retried"
+
+
+def test_concurrent_streams_share_one_generator():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def produce():
+        runs.append(1)
+        yield "a"
+        release.wait(5)
+        yield "b"
+
+    key = flight_key("s1", 2, "h")
+    first = flights.stream(key, produce)
+    assert next(first) == "a"
+    second = flights.stream(key, produce)
+    release.set()
+    assert list(first) == ["b"]
+    assert list(second) == ["a", "b"]
+    assert runs == [1]
+
+
+def test_expired_results_run_again():
+    flights = SingleFlight(ttl_sec=-1)
+    key = flight_key("s1", 1, "h")
+    flights.do(key, lambda: "first")
+    assert flights.do(key, lambda: "second") == "second"
+
+
+def test_forget_drops_only_that_session():
+    flights = SingleFlight()
+    flights.do(flight_key("s1", 1, "h"), lambda: "a")
+    flights.do(flight_key("s2", 1, "h"), lambda: "b")
+    flights.forget("s1")
+    assert flights.do(flight_key("s1", 1, "h"), lambda: "new") == "new"
+    assert flights.do(flight_key("s2", 1, "h"), lambda: "new") == "b"
+
+
+def test_prune_keeps_newest_finished_entries():
+    flights = SingleFlight(max_entries=2)
+    for n in range(3):
+        flights.do(flight_key("s1", n, "h"), lambda: n)
+    assert [key[1] for key in flights._flights] == [1, 2]
@@ -0,0 +1,43 @@
+# voice.py
+# One persistent browser component for voice: it reads the current question
+# aloud and streams speech-to-text back as the component value. It keeps the
+# same iframe for the whole interview (only its args change between reruns),
+# and interim transcripts are throttled in the browser.
+import os
+
+import streamlit.components.v1 as components
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "voice_component")
+
+# Minimum gap between interim transcript updates; each one reruns the answer pane
+INTERIM_THROTTLE_MS = int(os.getenv("VOICE_INTERIM_MS", 750))
+
+_voice_panel = components.declare_component("voice_panel", path=FRONTEND_DIR)
+
+
+def voice_panel(question, question_number, key="voice"):
+    """
+    Render the voice controls for this question.
+    Returns the latest transcript as {"mount", "seq", "question", "text", "final"},
+    or None before anything was said. The same value is returned on every rerun
+    until a newer one arrives; (mount, seq) identifies it.
+    """
+    return _voice_panel(
+        question=question,
+        question_number=question_number,
+        interim_ms=INTERIM_THROTTLE_MS,
+        key=key,
+        default=None,
+    )
+
+
+def new_transcript(value, question_number, last_seen):
+    """
+    The transcript text if `value` is a new update for this question, else None.
+    last_seen: the (mount, seq) of the last update applied
+    """
+    if not value or value.get("question") != question_number:
+        return None
+    if (value.get("mount"), value.get("seq")) == last_seen:
+        return None
+    return value.get("text") or ""